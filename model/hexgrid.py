@@ -1,13 +1,21 @@
 import math
-import queue
+import os
 import random
 import time
-from typing import Tuple, List, Dict
+from collections import deque
+from typing import Tuple, List, Dict, Iterable
 
+import numpy as np
+
+from model.lib_graph.abstractgraph import AbstractGraph
+from model.lib_graph.contraction_hierarchy import ContractionHierarchy
 from model.lib_graph.edge import Edge
 from model.lib_graph.graphlist import GraphList
+from model.lib_graph.landmarks import Landmarks
 from model.lib_graph.vertex import Vertex
-from model.tile import Tile
+from model.tile import Tile, Tiles
+from model.parallel_routing import ParallelTownRoutes
+from model.town_routes import TownRoutes
 
 Coords = Tuple[int, int]
 Interval = Tuple[float, float]
@@ -43,6 +51,9 @@ ground_type_color = {
     "lava": "orangered"
 }
 ground_color_type = {v: k for k, v in ground_type_color.items()}
+# the grounds are stored as small integer codes
+GROUND_TYPES = list(ground_type_color)
+GROUND_CODE = {ground: code for code, ground in enumerate(GROUND_TYPES)}
 
 MOVING_COST = {
     "plain": 2,
@@ -53,34 +64,51 @@ MOVING_COST = {
     "volcano": 6,
     "lava": 100000
 }
+# cheapest cost to move from a tile to one of its neighbours
+MIN_MOVING_COST = 2 * min(MOVING_COST.values())
+MOVING_COST_BY_CODE = [MOVING_COST[ground] for ground in GROUND_TYPES]
+MOVING_COST_ARRAY = np.array(MOVING_COST_BY_CODE, dtype=np.int64)
+
+# (dq, dr) cube coords moves to the 6 neighbours, in the order used to walk around a ring
+CUBE_DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+# (radius, column parity of the center) -> [(d_row, d_col, layer)], see HexGrid.spiral_stencil()
+STENCILS: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
 
 
 class HexGrid(GraphList):
-    def __init__(self, width, height, nb_towns: int = -1):
+    def __init__(self, width, height, nb_towns: int = -1, implicit: bool = False):
+        """
+        @param implicit: if True, no edge is stored. The neighbours and the weights are computed
+        on the fly from the coords and the tiles, so the memory used is proportional to the number of tiles only
+        """
         random.seed(time.time())
         self.width = width
         self.height = height
+        self.implicit = implicit
         self.towns: List[Coords] = []
+        # tile index -> (ground code, altitude) before its modification, see update_weights()
+        self.dirty_tiles: Dict[int, Tuple[int, int]] = {}
+        self.tracked_routes: TownRoutes = None
+        self.landmarks: Landmarks = None
+        self.landmarks_version = None
+        self.contraction_hierarchy: ContractionHierarchy = None
+        self.contraction_hierarchy_version = None
+
+        # init tiles with only plains. The tiles are stored in arrays, self.vertices gives Tile views on them
+        self.grounds = np.full(height * width, GROUND_CODE["plain"], dtype=np.uint8)
+        self.altitudes = self.pseudo_random_altitudes()
+        self.town_map = np.zeros(height * width, dtype=bool)
+        tiles = Tiles(self)
+
+        if implicit:
+            # no successors lists
+            AbstractGraph.__init__(self, "hex graph", tiles, directed=False)
+        else:
+            GraphList.__init__(self, "hex graph", tiles, directed=False)
 
-        # init tiles with only plains
-        tiles = [Tile(coord=(i, j),
-                      ground="plain",
-                      altitude=self.pseudo_random_altitude(i)
-                      )
-                 for i in range(height)
-                 for j in range(width)
-                 ]
-
-        GraphList.__init__(self, "hex graph", tiles, directed=False)
-
-        # init edges with a default weight = 1
-        # mandatory to then make a BFS for the self.area() function
-        for i in range(height):
-            for j in range(width):
-                for neighbor in self.get_neighbours_special_edges_(i, j):
-                    index_i_j = self.coord_2_i((i, j))
-                    index_neighbor = self.coord_2_i(neighbor)
-                    self.add_edge(Edge(index_i_j, index_neighbor))
+            # init edges with a default weight = 1, the real weights are set once the map is made
+            edges_u, edges_v = self.edge_pairs()
+            self.add_edges_from(edges_u, edges_v)
 
         d = math.floor((height * width) ** (1 / 3))  # cubic root of the nb of tiles
 
@@ -139,10 +167,12 @@ class HexGrid(GraphList):
         # add some rivers
         nb_sources = random.randint(d // 3, d // 2) + 1
         candidates_sources = [
-            tile.coord
-            for tile in self.vertices
-            if tile.altitude > 40
-               and tile.ground not in ["volcano", "lava"]
+            self.i_2_coord(i)
+            for i in np.flatnonzero(
+                (self.altitudes > 40)
+                & (self.grounds != GROUND_CODE["volcano"])
+                & (self.grounds != GROUND_CODE["lava"])
+            ).tolist()
         ]
         sources = random.choices(candidates_sources, k=min(nb_sources, len(candidates_sources)))
         for source in sources:
@@ -177,18 +207,177 @@ class HexGrid(GraphList):
                     )
                 )
             self.towns.append(town_coord)
-            self.get_Tile(town_coord).town = True
+            self.town_map[self.coord_2_i(town_coord)] = True
 
         # update edges wheights depending on the type of ground and the altitude difference
-        for edge in self.edges:
-            tile1: Tile = self.vertices[edge.u]
-            tile2: Tile = self.vertices[edge.v]
-            edge.weight = MOVING_COST[tile1.ground] + MOVING_COST[tile2.ground]
-            alt_diff = abs(tile1.altitude - tile2.altitude)
-            if alt_diff > 5:
-                edge.weight += alt_diff // 3
-            elif alt_diff > 10:
-                edge.weight += alt_diff // 2
+        # (in implicit mode they are computed when needed)
+        if not implicit:
+            weights = self.moving_costs(edges_u, edges_v)
+            for edge, weight in zip(self.edges, weights.tolist()):
+                edge.weight = weight
+            self.version += 1
+        self.dirty_tiles = {}
+
+    def moving_costs(self, us: np.ndarray, vs: np.ndarray) -> np.ndarray:
+        """
+        vectorised moving_cost(): weights of the edges (us[k], vs[k])
+        """
+        weights = MOVING_COST_ARRAY[self.grounds[us]] + MOVING_COST_ARRAY[self.grounds[vs]]
+        alt_diff = np.abs(self.altitudes[us].astype(np.int64) - self.altitudes[vs])
+        return weights + np.where(alt_diff > 5, alt_diff // 3, 0)
+
+    def moving_cost(self, u: int, v: int) -> int:
+        """
+        weight of the edge between the tiles u and v, depending on the type of ground and the altitude difference
+        """
+        return self.tiles_moving_cost(self.grounds[u], int(self.altitudes[u]), self.grounds[v], int(self.altitudes[v]))
+
+    @staticmethod
+    def tiles_moving_cost(ground1: int, altitude1: int, ground2: int, altitude2: int) -> int:
+        """
+        moving_cost() between two tiles given by their ground code and altitude
+        """
+        weight = MOVING_COST_BY_CODE[ground1] + MOVING_COST_BY_CODE[ground2]
+        alt_diff = abs(altitude1 - altitude2)
+        if alt_diff > 5:
+            weight += alt_diff // 3
+        elif alt_diff > 10:
+            weight += alt_diff // 2
+        return weight
+
+    def update_weights(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Recompute the weights of the edges around the tiles modified since the last call (self.dirty_tiles)
+        @return: (u, v, old_weight, new_weight) of the edges whose weight changed
+        """
+        changes = {}
+        for u in self.dirty_tiles:
+            for v in self.successors(u):
+                key = (min(u, v), max(u, v))
+                if key in changes:
+                    continue
+                if self.implicit:
+                    # the weight is computed on the fly, the old one comes from the saved values of the tiles
+                    ground_u, altitude_u = self.dirty_tiles[u]
+                    ground_v, altitude_v = self.dirty_tiles.get(v, (self.grounds[v], int(self.altitudes[v])))
+                    old_weight = self.tiles_moving_cost(ground_u, altitude_u, ground_v, altitude_v)
+                else:
+                    old_weight = self.get_Edge(u, v).weight
+                new_weight = self.moving_cost(u, v)
+                changes[key] = (old_weight, new_weight)
+
+        changes = [(u, v, old_weight, new_weight)
+                   for (u, v), (old_weight, new_weight) in changes.items()
+                   if old_weight != new_weight]
+        if not self.implicit:
+            for u, v, old_weight, new_weight in changes:
+                self.get_Edge(u, v).weight = new_weight
+        if changes:
+            self.version += 1
+        self.dirty_tiles = {}
+        return changes
+
+    def update_terrain(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Apply the modifications of the tiles: update the weights around them, then repair the tracked routes
+        between the towns instead of computing them again
+        @return: the modified edges, like update_weights()
+        """
+        version = self.version
+        changes = self.update_weights()
+        if self.tracked_routes is not None and changes:
+            if self.tracked_routes.version == version:
+                self.tracked_routes.repair(changes)
+            else:
+                # the graph has been modified another way since, the routes can't be repaired
+                self.tracked_routes = None
+        return changes
+
+    # graph methods overridden for the implicit mode
+
+    def successors(self, v: int) -> List[int]:
+        if not self.implicit:
+            return self.successors_list[v]
+        row, col = divmod(v, self.width)
+        return [x * self.width + y for x, y in self.get_neighbours(row, col)]
+
+    def weighted_successors(self, u: int) -> Iterable[Tuple[int, int]]:
+        if not self.implicit:
+            return GraphList.weighted_successors(self, u)
+        return [(v, self.moving_cost(u, v)) for v in self.successors(u)]
+
+    def degree(self, v: int, _in: bool = False, out: bool = False) -> int:
+        return len(self.successors(v))
+
+    def has_edge(self, v1: int, v2: int) -> bool:
+        return v2 in self.successors(v1)
+
+    def get_Edge(self, u: int, v: int) -> Edge:
+        if not self.implicit:
+            return GraphList.get_Edge(self, u, v)
+        return Edge(u, v, self.moving_cost(u, v))
+
+    def weight(self):
+        if not self.implicit:
+            return GraphList.weight(self)
+        return sum(w for u, v, w in self.arcs() if u < v)
+
+    # an implicit grid has no edges to modify: its edges come from the coords
+
+    def add_vertex(self, v: Vertex) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        GraphList.add_vertex(self, v)
+
+    def remove_vertex(self, v: int) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        GraphList.remove_vertex(self, v)
+
+    def compact(self) -> List[int]:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        return GraphList.compact(self)
+
+    def add_edge(self, e: Edge) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        GraphList.add_edge(self, e)
+
+    def add_edges_from(self, us: Iterable, vs: Iterable[int] = None, weights: Iterable = None) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        GraphList.add_edges_from(self, us, vs, weights)
+
+    def remove_edge(self, e: Edge) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, its edges come from the tiles")
+        GraphList.remove_edge(self, e)
+
+    def set_weight(self, u: int, v: int, weight: float) -> None:
+        if self.implicit:
+            raise TypeError("an implicit HexGrid is read-only, change the tiles to change the weights")
+        GraphList.set_weight(self, u, v, weight)
+
+    def v_index(self, name: str) -> int:
+        if not self.implicit:
+            return GraphList.v_index(self, name)
+        # the name of a tile is str(coords)
+        try:
+            row, col = (int(x) for x in name.strip("()").split(","))
+        except ValueError:
+            return None
+        if 0 <= row < self.height and 0 <= col < self.width and name == str((row, col)):
+            return self.coord_2_i((row, col))
+        return None
+
+    def print(self) -> None:
+        if not self.implicit:
+            return GraphList.print(self)
+        print(self.name)
+        for v in range(self.order):
+            print(str(self.i_2_coord(v)), " : ", [str(self.i_2_coord(u)) for u in self.successors(v)])
+        print()
 
     def i_2_coord(self, i: int) -> Coords:
         row = i // self.width
@@ -200,7 +389,55 @@ class HexGrid(GraphList):
         return row * self.width + col
 
     def get_Tile(self, coord: Coords) -> Tile:
-        return self.vertices[self.coord_2_i(coord)]
+        return Tile(self, self.coord_2_i(coord))
+
+    def get_ground(self, i: int) -> str:
+        return GROUND_TYPES[self.grounds[i]]
+
+    def set_ground(self, i: int, ground: str) -> None:
+        self.mark_dirty(i)
+        self.grounds[i] = GROUND_CODE[ground]
+        self.version += 1
+
+    def set_altitude(self, i: int, altitude: int) -> None:
+        self.mark_dirty(i)
+        self.altitudes[i] = altitude
+        self.version += 1
+
+    def mark_dirty(self, i: int) -> None:
+        """
+        remember the ground and altitude of the tile i before its first modification, see update_weights().
+        Called just before the version of the grid is incremented
+        """
+        if i not in self.dirty_tiles:
+            self.dirty_tiles[i] = (self.grounds[i], int(self.altitudes[i]))
+        if self.tracked_routes is not None and self.tracked_routes.version == self.version:
+            # update_terrain() will repair the tracked routes, they follow the version of the grid
+            self.tracked_routes.version += 1
+
+    @staticmethod
+    def cube_coord(coord: Coords) -> Tuple[int, int, int]:
+        """
+        Convert offset coords (odd columns shifted down) to cube coords
+        """
+        row, col = coord
+        q = col
+        r = row - (col - (col & 1)) // 2
+        return q, r, -q - r
+
+    def hex_distance(self, u: int, v: int) -> int:
+        """
+        number of moves between the tiles u and v
+        """
+        q1, r1, s1 = self.cube_coord(self.i_2_coord(u))
+        q2, r2, s2 = self.cube_coord(self.i_2_coord(v))
+        return max(abs(q1 - q2), abs(r1 - r2), abs(s1 - s2))
+
+    def heuristic(self, u: int, v: int) -> int:
+        """
+        admissible heuristic for a_star(): every move costs at least MIN_MOVING_COST
+        """
+        return self.hex_distance(u, v) * MIN_MOVING_COST
 
     def get_neighbours(self, x: int, y: int) -> List[Coords]:
         """
@@ -223,37 +460,94 @@ class HexGrid(GraphList):
             res = [(x + dx, y + dy) for dx, dy in ((1, 0), (1, 1), (0, 1))]
         return [(dx, dy) for dx, dy in res if 0 <= dx < self.height and 0 <= dy < self.width]
 
-    def pseudo_random_altitude(self, row: int, random_: int = 4, bonus: int = 40) -> int:
+    def edge_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        vectorised get_neighbours_special_edges_() on every tile:
+        the edges of the grid are (edges_u[k], edges_v[k])
         """
-        Generate a pseudo random altitude for __init__(). It creates a gradient from top to bottom
-        @param row:
+        rows, cols = np.divmod(np.arange(self.width * self.height), self.width)
+        even = cols % 2 == 0
+        edges_u, edges_v = [], []
+        for (dx_even, dy_even), (dx_odd, dy_odd) in zip(((1, 0), (0, 1), (-1, 1)), ((1, 0), (1, 1), (0, 1))):
+            x = rows + np.where(even, dx_even, dx_odd)
+            y = cols + np.where(even, dy_even, dy_odd)
+            inside = (0 <= x) & (x < self.height) & (0 <= y) & (y < self.width)
+            edges_u.append((rows * self.width + cols)[inside])
+            edges_v.append((x * self.width + y)[inside])
+        return np.concatenate(edges_u), np.concatenate(edges_v)
+
+    def pseudo_random_altitudes(self, random_: int = 4, bonus: int = 40) -> np.ndarray:
+        """
+        Generate the pseudo random altitudes of every tile for __init__(). It creates a gradient from top to bottom
         @param random_: adjust the variation on each row
         @param bonus: altitude max added
         """
-        altitude_init = random.randint(
-            0,
-            random_
-        )
+        rng = np.random.default_rng(random.getrandbits(32))
+        altitude_init = rng.integers(0, random_, size=self.height * self.width, endpoint=True)
         # no randomness for altitude bonus it only depends on the row
-        altitude_bonus = math.floor(transfert_ensemble_proportionnel((0, self.height), (0, bonus), row))
-        return altitude_init + altitude_bonus
+        rows = np.arange(self.height * self.width) // self.width
+        altitude_bonus = np.floor(np.clip(bonus / self.height * rows, 0, bonus))
+        return (altitude_init + altitude_bonus).astype(np.int16)
+
+    @staticmethod
+    def cube_ring(distance: int) -> List[Tuple[int, int]]:
+        """
+        (dq, dr) cube coords moves to the tiles at the given distance, walking around the ring
+        """
+        if distance == 0:
+            return [(0, 0)]
+        ring = []
+        q, r = -distance, distance  # CUBE_DIRECTIONS[4] * distance
+        for dq, dr in CUBE_DIRECTIONS:
+            for _ in range(distance):
+                ring.append((q, r))
+                q, r = q + dq, r + dr
+        return ring
+
+    @staticmethod
+    def spiral_stencil(radius: int, parity: int) -> List[Tuple[int, int, int]]:
+        """
+        (d_row, d_col, layer) offsets from a center in a column of the given parity to the tiles of its area,
+        ring after ring. Computed once per radius and parity
+        """
+        key = (radius, parity)
+        if key not in STENCILS:
+            stencil = []
+            for distance in range(radius):
+                for dq, dr in HexGrid.cube_ring(distance):
+                    col = parity + dq
+                    # back to offset coords, the center being at (0, parity)
+                    stencil.append((dr + (col - (col & 1)) // 2, dq, distance + 1))
+            STENCILS[key] = stencil
+        return STENCILS[key]
+
+    def ring(self, center: Coords, distance: int) -> List[Coords]:
+        """
+        coords of the tiles at exactly distance moves from center
+        """
+        row, col = center
+        parity = col & 1
+        ring = []
+        for dq, dr in self.cube_ring(distance):
+            c = parity + dq
+            x, y = row + dr + (c - (c & 1)) // 2, col + dq
+            if 0 <= x < self.height and 0 <= y < self.width:
+                ring.append((x, y))
+        return ring
 
     def area(self, center: Coords, radius: int = 3, return_layer: bool = False):
-        marquage = [0] * self.order
-        file = queue.Queue()
-        file.put((self.coord_2_i(center), 1))
+        """
+        coords of the tiles less than radius moves away from center, ring after ring, without a traversal:
+        the offsets come from spiral_stencil() and are clipped to the grid, so the cost is the size of the area
+        @param return_layer: then give (coords, layer) pairs, the layer being the distance to center + 1
+        """
+        row, col = center
+        height, width = self.height, self.width
         area = []
-
-        while not file.empty():
-            u, layer = file.get()
-            if layer > radius:
-                break
-            area.append((self.i_2_coord(u), layer) if return_layer else self.i_2_coord(u))
-            for v in self.successors(u):
-                if marquage[v] == 0:
-                    file.put((v, layer + 1))
-                    marquage[v] = 1
-            marquage[u] = 2
+        for d_row, d_col, layer in self.spiral_stencil(radius, col & 1):
+            x, y = row + d_row, col + d_col
+            if 0 <= x < height and 0 <= y < width:
+                area.append(((x, y), layer) if return_layer else (x, y))
 
         return area
 
@@ -288,32 +582,36 @@ class HexGrid(GraphList):
                 tile.ground = "lava"
 
     def get_altitude_max(self):
-        return max(self.vertices, key=lambda tile: tile.altitude).altitude
+        return int(self.altitudes.max())
 
     def longest_river(self, src: Coords) -> List[Coords]:
         src = self.coord_2_i(src)
-        pred: List[Coords] = [None] * self.order
-        visited = [False] * self.order
-        pile = queue.LifoQueue()
+        pred: Dict[int, int] = {}
+        visited, epoch = self.acquire_stamps()
+        pile = deque()
         deepest_node = src
         max_depth = 0
+        altitudes = self.altitudes
+        grounds = self.grounds
+        no_river = {GROUND_CODE["volcano"], GROUND_CODE["lava"]}
 
-        visited[src] = True
-        pile.put((src, 0))
-        while not pile.empty():
-            u, depth = pile.get()
+        visited[src] = epoch
+        pile.append((src, 0))
+        while pile:
+            u, depth = pile.pop()
 
             if depth > max_depth:
                 max_depth = depth
                 deepest_node = u
 
             for v in self.successors(u):
-                if not visited[v] \
-                        and self.vertices[v].altitude <= self.vertices[u].altitude \
-                        and self.vertices[v].ground not in {"volcano", "lava"}:
-                    pile.put((v, depth + 1))
+                if visited[v] != epoch \
+                        and altitudes[v] <= altitudes[u] \
+                        and grounds[v] not in no_river:
+                    pile.append((v, depth + 1))
                     pred[v] = u
-                    visited[v] = True
+                    visited[v] = epoch
+        self.release_stamps(visited)
 
         path = self.path(pred, src, deepest_node)
         path = [self.i_2_coord(tile) for tile in path]
@@ -323,8 +621,7 @@ class HexGrid(GraphList):
             lake_center = random.choice(path[l//2::])
             lake_radius = random.randint(2, 3)
             lake_coords = self.area(lake_center, lake_radius)
-            coord_alt_min = min(lake_coords, key=lambda c: self.get_Tile(c).altitude)
-            alt_min = self.get_Tile(coord_alt_min).altitude
+            alt_min = min(self.get_Tile(coord).altitude for coord in lake_coords)
             for coord in lake_coords:
                 self.get_Tile(coord).altitude = alt_min
             path += lake_coords
@@ -345,40 +642,249 @@ class HexGrid(GraphList):
                     network.append(self.shortest_path(self.coord_2_i(town), self.coord_2_i(other_town)))
         return network
 
-    def shortest_network(self):
+    # searches overridden to first apply the modifications of the tiles,
+    # so that an explicit grid doesn't route on the old weights while an implicit one sees the new ones
+
+    def dijkstra(self, s0: int = 0, s1: int = None, engine: str = "heap") -> (List[int], List[float]):
+        if self.dirty_tiles:
+            self.update_terrain()
+        return GraphList.dijkstra(self, s0, s1, engine)
+
+    def dijkstra_targets(self, s0: int, targets: Iterable[int]) -> (List[int], List[float]):
+        if self.dirty_tiles:
+            self.update_terrain()
+        return GraphList.dijkstra_targets(self, s0, targets)
+
+    def dijkstra_multi_source(self, sources: Iterable[int]) -> (List[int], List[float], List[int]):
+        if self.dirty_tiles:
+            self.update_terrain()
+        return GraphList.dijkstra_multi_source(self, sources)
+
+    def a_star(self, s0: int, s1: int, heuristic) -> (List[int], float):
+        if self.dirty_tiles:
+            self.update_terrain()
+        return GraphList.a_star(self, s0, s1, heuristic)
+
+    def route(self, u: int, v: int, engine: str = "heap") -> (List[int], float):
+        """
+        path and cost from the tile u to the tile v
+        @param engine: "a_star", "alt" (landmarks, see preprocess_alt()), "ch" (contraction hierarchy,
+        see preprocess_ch()), or a dijkstra engine ("heap", "naif" or "bidirectional")
+        The results are kept in self.path_cache, which gives copies: the caller can modify them
+        """
+        if self.dirty_tiles:
+            self.update_terrain()
+        if engine in {"a_star", "alt", "ch"}:
+            result = self.path_cache.get(u, v, engine)
+            if result is not None:
+                self.expanded_nodes = 0
+                return result
+            if engine == "a_star":
+                result = self.a_star(u, v, self.heuristic)
+            elif engine == "alt":
+                if self.landmarks is None or self.landmarks_version != self.version:
+                    self.preprocess_alt()
+                result = self.landmarks.query(u, v)
+            else:
+                if self.contraction_hierarchy is None or self.contraction_hierarchy_version != self.version:
+                    self.preprocess_ch()
+                result = self.contraction_hierarchy.query(u, v)
+                self.expanded_nodes = self.contraction_hierarchy.expanded_nodes
+            self.path_cache.put(u, v, result, engine)
+            return result
+        return self.dijkstra(u, v, engine)
+
+    def preprocess_alt(self, nb_landmarks: int = 4) -> Landmarks:
+        """
+        Choose the landmarks used by route(engine="alt") and compute their distances to every tile
+        @param nb_landmarks: more landmarks make the queries faster but use more memory
+        """
+        self.landmarks = Landmarks(self, nb_landmarks)
+        self.landmarks_version = self.version
+        return self.landmarks
+
+    def preprocess_ch(self, file_path: str = None) -> ContractionHierarchy:
+        """
+        Build the contraction hierarchy used by route(engine="ch"). It takes time, but then each query
+        only takes a few milliseconds as long as the map doesn't change
+        @param file_path: if given, the hierarchy is loaded from this file if it exists and was made for this map,
+        else built and saved in it
+        """
+        if self.dirty_tiles:
+            self.update_terrain()
+        hierarchy = None
+        if file_path is not None and os.path.exists(file_path):
+            hierarchy = ContractionHierarchy.load(file_path)
+            if not hierarchy.matches(self):
+                print("the contraction hierarchy of", file_path, "was made for another map, it is built again")
+                hierarchy = None
+        if hierarchy is not None:
+            self.contraction_hierarchy = hierarchy
+        else:
+            self.contraction_hierarchy = ContractionHierarchy.build(self)
+            if file_path is not None:
+                self.contraction_hierarchy.save(file_path)
+        self.contraction_hierarchy_version = self.version
+        return self.contraction_hierarchy
+
+    def town_routes(self, track: bool = False) -> TownRoutes:
+        """
+        costs and paths between every pair of towns, with one dijkstra per town
+        @param track: compute complete trees and keep them in self.tracked_routes,
+        so that update_terrain() repairs them after modifications of the tiles
+        """
+        if self.dirty_tiles:
+            self.update_terrain()
+        towns = [self.coord_2_i(town) for town in self.towns]
+        if self.tracked_routes is not None and self.tracked_routes.towns == towns:
+            if self.tracked_routes.version == self.version:
+                return self.tracked_routes
+            # modified by set_weight(), add_edge()... which update_terrain() doesn't see: compute them again
+            track = True
+        routes = TownRoutes(self, towns, full_trees=track)
+        if track:
+            self.tracked_routes = routes
+        return routes
+
+    def parallel_town_routes(self, workers: int = None) -> ParallelTownRoutes:
+        """
+        town_routes() with the searches shared between several processes
+        @param workers: number of processes, the number of cores by default
+        """
+        if self.dirty_tiles:
+            self.update_terrain()
+        return ParallelTownRoutes(self, [self.coord_2_i(town) for town in self.towns], workers)
+
+    def routes_between_towns(self, routing: str, engine: str, workers: int = None):
+        """
+        @return: the TownRoutes (or ParallelTownRoutes) of the routing "per_town" (or "parallel"),
+        None for the routing "per_pair" which searches each pair with route()
+        """
+        if routing not in {"per_town", "parallel", "per_pair"}:
+            print("unknown routing:", routing)
+            return None
+        if routing == "per_pair":
+            return None
+        if engine != "heap":
+            print("the routing", routing, "always uses the heap dijkstra, the engine", engine, "is ignored")
+        return self.town_routes() if routing == "per_town" else self.parallel_town_routes(workers)
+
+    def shortest_network(self, engine: str = "heap", routing: str = "per_town", workers: int = None):
+        """
+        @param engine: search used by the routing "per_pair": "heap", "naif", "bidirectional", "a_star", "alt" or "ch"
+        @param routing: "per_town" for one heap dijkstra per town, "parallel" to run them in several processes,
+        "per_pair" for one search with engine per pair of towns
+        @param workers: number of processes of the routing "parallel"
+        the total number of expanded nodes is then stored in self.expanded_nodes
+        """
+        routes = self.routes_between_towns(routing, engine, workers)
+        if routes is not None:
+            self.expanded_nodes = routes.expanded_nodes
+            return [routes.path(i, j) for i, j in routes.pairs()]
+
         network: List[List[int]] = []
+        expanded_nodes = 0
         for i, town in enumerate(self.towns):
             for other_town in self.towns[i + 1::]:
                 if town != other_town:
-                    path, path_cost = self.dijkstra(self.coord_2_i(town), self.coord_2_i(other_town))
+                    path, path_cost = self.route(self.coord_2_i(town), self.coord_2_i(other_town), engine)
+                    expanded_nodes += self.expanded_nodes
                     network.append(path)
+        self.expanded_nodes = expanded_nodes
         return network
 
-    def minimal_network(self):
-        network: Dict[Tuple[Coords, Coords]: List[int]] = {}
-        towns_graph = GraphList("town graph", [Vertex(str(town_coord)) for town_coord in self.towns])
+    def minimal_network(self, engine: str = "heap", routing: str = "per_town", workers: int = None):
+        """
+        @param engine: search used by the routing "per_pair": "heap", "naif", "bidirectional", "a_star", "alt" or "ch"
+        @param routing: "per_town" for one heap dijkstra per town, "parallel" to run them in several processes,
+        "per_pair" for one search with engine per pair of towns,
+        "steiner" for the approximation of the Steiner tree of steiner_network()
+        @param workers: number of processes of the routing "parallel"
+        the total number of expanded nodes is then stored in self.expanded_nodes
+        """
+        if routing == "steiner":
+            return self.steiner_network()
 
-        def town_coord_2_index(town_coord: Coords):
-            for j, vertex in enumerate(towns_graph.vertices):
-                if vertex.name == str(town_coord):
-                    return j
+        towns_graph = GraphList("town graph", [Vertex(str(town_coord)) for town_coord in self.towns])
+        routes = self.routes_between_towns(routing, engine, workers)
+        network: Dict[Tuple[int, int]: List[int]] = {}
+        expanded_nodes = routes.expanded_nodes if routes is not None else 0
 
         for i, town in enumerate(self.towns):
-            for other_town in self.towns[i + 1::]:
+            for j in range(i + 1, len(self.towns)):
+                other_town = self.towns[j]
                 if town != other_town:
-                    path, path_cost = self.dijkstra(self.coord_2_i(town), self.coord_2_i(other_town))
-                    network[(town, other_town)] = path
-                    towns_graph.add_edge(Edge(
-                        u=town_coord_2_index(town),
-                        v=town_coord_2_index(other_town),
-                        weight=path_cost))
-
+                    if routes is not None:
+                        path_cost = routes.costs[i][j]
+                    else:
+                        path, path_cost = self.route(self.coord_2_i(town), self.coord_2_i(other_town), engine)
+                        expanded_nodes += self.expanded_nodes
+                        network[(i, j)] = path
+                    towns_graph.add_edge(Edge(u=i, v=j, weight=path_cost))
+
+        self.expanded_nodes = expanded_nodes
         arpm = GraphList.arpm(towns_graph)
 
         minimal_network = []
         for edge in arpm.edges:
-            town1_coord = eval(arpm.vertices[edge.u].name)
-            town2_coord = eval(arpm.vertices[edge.v].name)
-            minimal_network.append(network[(town1_coord, town2_coord)])
+            i, j = min(edge.u, edge.v), max(edge.u, edge.v)
+            minimal_network.append(routes.path(i, j) if routes is not None else network[(i, j)])
 
         return minimal_network
+
+    def towns_connected(self) -> bool:
+        """
+        Check that the towns can reach each other without crossing lava, with a single labelling of the map
+        """
+        lava = GROUND_CODE["lava"]
+        grounds = self.grounds
+        component, sizes = self.components(lambda v: grounds[v] != lava)
+        labels = {component[self.coord_2_i(town)] for town in self.towns}
+        return len(labels) <= 1 and -1 not in labels
+
+    def nearest_town(self) -> (List[Coords], List[float]):
+        """
+        Voronoi partition of the map by travel cost, with one dijkstra started from every town
+        @return: (town, dist): town[i] is the coords of the town nearest to the tile i (None if it can't be reached)
+        and dist[i] the cost to go there
+        """
+        pred, dist, origin = self.dijkstra_multi_source(self.coord_2_i(town) for town in self.towns)
+        return [None if town is None else self.i_2_coord(town) for town in origin], dist
+
+    def steiner_network(self) -> List[List[int]]:
+        """
+        Mehlhorn's approximation of the Steiner tree connecting the towns (at most twice the optimal cost).
+        A single dijkstra started from every town at once splits the map into the regions of the nearest town,
+        an edge between two regions gives a path between their towns. The MST of these paths is the network.
+        Roads can share tiles, unlike the MST of minimal_network() which pays for each town to town path.
+        """
+        towns = list(dict.fromkeys(self.coord_2_i(town) for town in self.towns))
+
+        # origin[u] is the town nearest to u
+        pred, dist, origin = self.dijkstra_multi_source(towns)
+
+        # cheapest edge between each pair of neighbour regions
+        bridges: Dict[Tuple[int, int]: Tuple[float, int, int]] = {}
+        for u, v, w in self.arcs():
+            if origin[u] is None or origin[v] is None or origin[u] >= origin[v]:
+                continue
+            cost = dist[u] + w + dist[v]
+            key = (origin[u], origin[v])
+            if key not in bridges or cost < bridges[key][0]:
+                bridges[key] = (cost, u, v)
+
+        town_index = {town: k for k, town in enumerate(towns)}
+        towns_graph = GraphList("town graph", [Vertex(str(self.i_2_coord(town))) for town in towns])
+        for (town1, town2), (cost, u, v) in bridges.items():
+            towns_graph.add_edge(Edge(town_index[town1], town_index[town2], cost))
+        arpm = GraphList.arpm(towns_graph)
+
+        # expand each edge of the MST into the tiles path town1 -> u -> v -> town2
+        steiner_network = []
+        for edge in arpm.edges:
+            town1, town2 = sorted((towns[edge.u], towns[edge.v]))
+            cost, u, v = bridges[(town1, town2)]
+            path = AbstractGraph.path(pred, town1, u) + AbstractGraph.path(pred, town2, v)[::-1]
+            steiner_network.append(path)
+
+        return steiner_network
@@ -1,8 +1,14 @@
-import queue
-from typing import List, Tuple, Dict
+import heapq
+import itertools
+from collections import deque
+from typing import List, Tuple, Dict, Iterable, Iterator, Callable
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from model.lib_graph.edge import Edge
+from model.lib_graph.path_cache import PathCache
+from model.lib_graph.union_find import UnionFind
 from model.lib_graph.vertex import Vertex
 
 number = int | float
@@ -17,6 +23,14 @@ class AbstractGraph(ABC):
         self.vertices = vertices
         self.edges = []
         self.edges_index: Dict[Tuple[int, int]: int] = {}
+        # removed vertices that keep their index until the graph is compacted (see GraphList.remove_vertex())
+        self.tombstones = set()
+        self.expanded_nodes = 0  # number of vertices settled by the last shortest path search
+        self.version = 0  # incremented on every change of the edges or of their weights
+        self.path_cache = PathCache(self)
+        # reusable marking arrays for the traversals, see acquire_stamps()
+        self._stamps_pool: List[List[int]] = []
+        self._epoch = 0
 
     # methods for vertices
 
@@ -44,6 +58,14 @@ class AbstractGraph(ABC):
     def v_index(self, name: str) -> int:
         pass
 
+    def live_vertices(self) -> Iterable[int]:
+        """
+        the vertices that are not removed
+        """
+        if not self.tombstones:
+            return range(self.order)
+        return (v for v in range(self.order) if v not in self.tombstones)
+
     # methods for edges
 
     @abstractmethod
@@ -64,6 +86,32 @@ class AbstractGraph(ABC):
         except KeyError:
             return self.edges[self.edges_index[(v, u)]]
 
+    def set_weight(self, u: int, v: int, weight: number) -> None:
+        self.get_Edge(u, v).weight = weight
+        self.version += 1
+
+    def weighted_successors(self, u: int) -> Iterable[Tuple[int, number]]:
+        """
+        Return the successors of u with the weight of the edge leading to them.
+        Subclasses should override it when they can avoid the get_Edge() lookup.
+        """
+        return [(v, self.get_Edge(u, v).weight) for v in self.successors(u)]
+
+    def arcs(self) -> Iterable[Tuple[int, int, number]]:
+        """
+        Yield (u, v, weight) for every arc. An edge of a non directed graph gives two arcs
+        """
+        for u in range(self.order):
+            for v, w in self.weighted_successors(u):
+                yield u, v, w
+
+    def edges_from_arcs(self) -> List[Edge]:
+        """
+        The edges built from arcs(), once for an edge of a non directed graph.
+        Unlike self.edges, it works for the graphs that don't store their edges (implicit HexGrid)
+        """
+        return [Edge(u, v, w) for u, v, w in self.arcs() if self.directed or u < v]
+
     @abstractmethod
     def print(self) -> int:
         pass
@@ -71,133 +119,291 @@ class AbstractGraph(ABC):
     def weight(self):
         return sum([e.weight for e in self.edges])
 
+    # traversals
+
+    def acquire_stamps(self) -> (List[int], int):
+        """
+        Marking array for a traversal: v is marked when stamps[v] == epoch. The arrays are reused and each
+        traversal gets a new epoch, so nothing has to be reset. Give the array back with release_stamps()
+        """
+        stamps = self._stamps_pool.pop() if self._stamps_pool else []
+        if len(stamps) < self.order:
+            stamps.extend([0] * (self.order - len(stamps)))
+        self._epoch += 1
+        return stamps, self._epoch
+
+    def release_stamps(self, stamps: List[int]) -> None:
+        self._stamps_pool.append(stamps)
+
+    def traverse_BFS(self, s0: int = 0, all_components: bool = False) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (vertex, parent, depth) in BFS order, lazily: the caller can stop whenever it wants
+        @param all_components: then restart from the unvisited vertices, which are yielded with parent None
+        """
+        stamps, epoch = self.acquire_stamps()
+        try:
+            roots = self.live_vertices() if all_components else ()
+            for root in itertools.chain((s0,), roots):
+                if stamps[root] == epoch:
+                    continue
+                stamps[root] = epoch
+                file = deque([(root, None, 0)])
+                while file:
+                    u, parent, depth = file.popleft()
+                    yield u, parent, depth
+                    for v in self.successors(u):
+                        if stamps[v] != epoch:
+                            stamps[v] = epoch
+                            file.append((v, u, depth + 1))
+        finally:
+            self.release_stamps(stamps)
+
+    def traverse_DFS(self, s0: int = 0, all_components: bool = False) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (vertex, parent, depth) in DFS preorder, lazily
+        @param all_components: then restart from the unvisited vertices, which are yielded with parent None
+        """
+        stamps, epoch = self.acquire_stamps()
+        try:
+            roots = self.live_vertices() if all_components else ()
+            for root in itertools.chain((s0,), roots):
+                if stamps[root] == epoch:
+                    continue
+                pile = deque([(root, None, 0)])
+                while pile:
+                    u, parent, depth = pile.pop()
+                    if stamps[u] == epoch:
+                        continue
+                    stamps[u] = epoch
+                    yield u, parent, depth
+                    for v in reversed(self.successors(u)):
+                        if stamps[v] != epoch:
+                            pile.append((v, u, depth + 1))
+        finally:
+            self.release_stamps(stamps)
+
     def DFS(self, s0: int = 0) -> List[int]:
-        pile = queue.LifoQueue()
-        marquage = [0] * self.order  # 0: white, 1: grey, 2: black
         pred = [None] * self.order
-
-        def DFS_inner(s: int) -> None:
-            marquage[s] = 1
-            pile.put(s)
-            while not pile.empty():
-                u = pile.get()
-                for v in self.successors(u):
-                    if marquage[v] == 0:
-                        pile.put(v)
-                        pred[v] = u
-                        marquage[v] = 1
-                marquage[u] = 2
-
-        DFS_inner(s0)
-        for i, color in enumerate(marquage):
-            if color == 0:
-                DFS_inner(i)
-
+        for v, parent, depth in self.traverse_DFS(s0, all_components=True):
+            pred[v] = parent
         return pred
 
     def BFS(self, s0: int = 0) -> List[int]:
-        file = queue.Queue()
-        marquage = [0] * self.order  # 0: white, 1: grey, 2: noir
         pred = [None] * self.order
-
-        def BFS_inner(s: int) -> None:
-            marquage[s] = 1
-            file.put(s)
-            while not file.empty():
-                u = file.get()
-                for v in self.successors(u):
-                    if marquage[v] == 0:
-                        file.put(v)
-                        pred[v] = u
-                        marquage[v] = 1
-                marquage[u] = 2
-
-        BFS_inner(s0)
-        for i, color in enumerate(marquage):
-            if color == 0:
-                BFS_inner(i)
-
+        for v, parent, depth in self.traverse_BFS(s0, all_components=True):
+            pred[v] = parent
         return pred
 
     def BFS_truncate(self, s0: int = 0, max_layer: int = 2) -> List[int]:
-        file = queue.Queue()
-        marquage = [0] * self.order  # 0: white, 1: grey, 2: black
+        """
+        BFS from s0 limited to the vertices at most max_layer edges away, the others keep a None predecessor
+        """
         pred = [None] * self.order
+        for v, parent, depth in self.traverse_BFS(s0):
+            if depth > max_layer:
+                break
+            pred[v] = parent
+        return pred
 
-    def topological_sort(self, s0: int = 0) -> List[int]:
-        start = [None] * self.order
-        end = [None] * self.order
-        t = 0
+    def topological_sort(self, s0: int = 0) -> Tuple[List[int] | bool, List[int] | None]:
+        """
+        DFS with an explicit stack: a vertex is added when it turns black, the reversed post-order is topological
+        @return: (order, circuit) with circuit None if the graph has none, else a circuit [v1, ..., vk]
+        (arcs v1 -> v2 ... vk -> v1) and order False. (False, None) for a non directed graph, which has no order
+        """
+        if not self.directed:
+            return False, None
+        post_order = []
         marquage = [0] * self.order  # 0: white ; 1: grey ; 2: black
-
-        def t_s_inner(u: int):
-            nonlocal t
-            marquage[u] = 1
-            t += 1
-            start[u] = t
+        for root in itertools.chain((s0,), self.live_vertices()):
+            if marquage[root] != 0:
+                continue
+            marquage[root] = 1
+            pile = deque([(root, iter(self.successors(root)))])
+            while pile:
+                u, successors = pile[-1]
+                for v in successors:
+                    if marquage[v] == 1:
+                        # the circuit is the part of the current path from v to u
+                        circuit = [x for x, _ in pile]
+                        return False, circuit[circuit.index(v):]
+                    if marquage[v] == 0:
+                        marquage[v] = 1
+                        pile.append((v, iter(self.successors(v))))
+                        break
+                else:
+                    marquage[u] = 2
+                    post_order.append(u)
+                    pile.pop()
+
+        post_order.reverse()
+        return post_order, None
+
+    def topological_sort_kahn(self) -> Tuple[List[int] | bool, List[int] | None]:
+        """
+        Kahn's algorithm: repeatedly take a vertex without remaining predecessors
+        @return: (order, blocked) with blocked None if the graph has no circuit, else the vertices left
+        with predecessors: those on a circuit or after one, and order False.
+        (False, None) for a non directed graph, which has no order
+        """
+        if not self.directed:
+            return False, None
+        in_degree = [0] * self.order
+        for u, v, w in self.arcs():
+            in_degree[v] += 1
+
+        file = deque(v for v in self.live_vertices() if in_degree[v] == 0)
+        order = []
+        while file:
+            u = file.popleft()
+            order.append(u)
             for v in self.successors(u):
-                if marquage[v] == 0:
-                    t_s_inner(v)
-            marquage[u] = 2
-            t += 1
-            end[u] = t
-
-        t_s_inner(s0)
-        for i, color in enumerate(marquage):
-            if color == 0:
-                t_s_inner(i)
+                in_degree[v] -= 1
+                if in_degree[v] == 0:
+                    file.append(v)
 
-        indexed_list = list(enumerate(end))  # List[s, fin(s)] with s a vertex
-        indexed_list.sort(key=lambda tuple_: tuple_[1], reverse=True)  # sort the vertices by their end time
-        indexes_sorted = [tuple_[0] for tuple_ in indexed_list]  # keep only the vertices
-
-        return indexes_sorted
+        if len(order) < self.order - len(self.tombstones):
+            return False, [v for v in range(self.order) if in_degree[v] > 0]
+        return order, None
 
     def shortest_path(self, start: int, end: int) -> list[int]:
-        pred = self.BFS(start)
-        path = [end]
-        current_vertex = end
-        while current_vertex != start:
-            path.insert(0, pred[current_vertex])
-            current_vertex = pred[current_vertex]
+        return self.bidirectional_BFS(start, end)
+
+    def backward_successors(self, v: int) -> Iterable[Tuple[int, number]]:
+        """
+        (u, weight) for the arcs u -> v, to search backwards
+        """
+        if not self.directed:
+            return self.weighted_successors(v)
+        return [(u, self.get_Edge(u, v).weight) for u in self.predecessors(v)]
 
+    @staticmethod
+    def join_paths(pred_forward: Dict[int, int], pred_backward: Dict[int, int], meeting: int) -> List[int]:
+        """
+        path from the root of pred_forward to the root of pred_backward, through meeting
+        """
+        path = []
+        v = meeting
+        while v is not None:
+            path.append(v)
+            v = pred_forward[v]
+        path.reverse()
+        v = pred_backward[meeting]
+        while v is not None:
+            path.append(v)
+            v = pred_backward[v]
         return path
 
+    def bidirectional_BFS(self, start: int, end: int) -> List[int]:
+        """
+        Path with the fewest edges from start to end: a BFS from each end, the smallest frontier
+        is expanded one layer at a time until they meet. False if there is no path
+        """
+        if start == end:
+            return [start]
+        pred = ({start: None}, {end: None})
+        frontiers = ([start], [end])
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            next_frontier = []
+            for u in frontiers[side]:
+                neighbours = self.successors(u) if side == 0 else [v for v, _ in self.backward_successors(u)]
+                for v in neighbours:
+                    if v in pred[side]:
+                        continue
+                    pred[side][v] = u
+                    if v in pred[1 - side]:
+                        return self.join_paths(pred[0], pred[1], v)
+                    next_frontier.append(v)
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        print('no path found')
+        return False
+
+    def label_components(self, component: List[int], accept: Callable[[int], bool] = None) -> Iterator[int]:
+        """
+        BFS labelling of the connected components (weakly connected in a directed graph), lazily:
+        component[v] is set to the label of v and the size of each component is yielded once it is complete
+        @param component: list of order -1, the vertices left at -1 are not labelled yet
+        @param accept: if given, only the vertices with accept(v) are labelled, the others keep -1
+        """
+        if self.directed:
+            neighbours = [[] for _ in range(self.order)]
+            for u, v, _ in self.arcs():
+                neighbours[u].append(v)
+                neighbours[v].append(u)
+            neighbours = neighbours.__getitem__
+        else:
+            neighbours = self.successors
+
+        label = 0
+        for root in self.live_vertices():
+            if component[root] != -1 or (accept is not None and not accept(root)):
+                continue
+            component[root] = label
+            size = 0
+            file = deque([root])
+            while file:
+                u = file.popleft()
+                size += 1
+                for v in neighbours(u):
+                    if component[v] == -1 and (accept is None or accept(v)):
+                        component[v] = label
+                        file.append(v)
+            yield size
+            label += 1
+
+    def components(self, accept: Callable[[int], bool] = None) -> (List[int], List[int]):
+        """
+        @param accept: if given, only the vertices with accept(v) are kept, the others get the label -1
+        @return: component[v] the label of the component of v, and sizes[c] the number of vertices of the component c
+        """
+        component = [-1] * self.order
+        sizes = list(self.label_components(component, accept))
+        return component, sizes
+
     def is_connex(self):
-        return self.BFS().count(None) <= 1
+        # the graph is connex if the first component holds every vertex, no need to look for the others
+        first_size = next(self.label_components([-1] * self.order), 0)
+        return first_size == self.order - len(self.tombstones)
 
     def has_cycle(self) -> bool:
-        pile = queue.LifoQueue()
-        marquage = [0] * self.order  # 0: white, 1: grey, 2: black
+        if not self.directed:
+            # a non directed graph has a cycle as soon as an edge joins two already connected vertices
+            union_find = UnionFind(self.order)
+            for u, v, w in self.arcs():
+                if u <= v and not union_find.union(u, v):
+                    return True
+            return False
 
-        def DFS_find_cycle(s: int) -> bool:
-            marquage[s] = 1
-            pile.put(s)
-            while not pile.empty():
-                u = pile.get()
-                for v in self.successors(u):
+        # DFS: a cycle exists if a successor is still on the current path (grey)
+        marquage = [0] * self.order  # 0: white, 1: grey, 2: black
+        for root in range(self.order):
+            if marquage[root] != 0:
+                continue
+            marquage[root] = 1
+            pile = deque([(root, iter(self.successors(root)))])
+            while pile:
+                u, successors = pile[-1]
+                for v in successors:
+                    if marquage[v] == 1:
+                        return True
                     if marquage[v] == 0:
-                        pile.put(v)
                         marquage[v] = 1
-                    elif marquage[v] == 1:
-                        # Cycle detected, we have already visited this vertex that is in the successors of u
-                        return True
-                marquage[u] = 2
-            # no cycle has been detected
-            return False
-
-        # for each connex component : check if there is a cycle
-        for i, color in enumerate(marquage):
-            if color == 0:
-                if DFS_find_cycle(i):
-                    return True  # Graph has a cycle
+                        pile.append((v, iter(self.successors(v))))
+                        break
+                else:
+                    marquage[u] = 2
+                    pile.pop()
 
         return False  # No cycle found
 
     @classmethod
     def kruskal_naif(cls, g: '"AbstractGraph"') -> '"AbstractGraph"':
         kraph = cls("kruskal naif", g.vertices)
-        edges = sorted(g.edges, key=lambda e: e.weight)
+        kraph.tombstones = set(g.tombstones)
+        edges = sorted(g.edges_from_arcs(), key=lambda e: e.weight)
         for e in edges:
             kraph.add_edge(e)
             if kraph.has_cycle():
@@ -206,24 +412,15 @@ class AbstractGraph(ABC):
 
     @classmethod
     def kruskal_Union_Find(cls, g: '"AbstractGraph"') -> '"AbstractGraph"':
-        def Find(v: int) -> int:
-            if parent[v] is None:
-                return v
-            return Find(parent[v])
-
-        def Union(u: int, v: int) -> None:
-            u_root = Find(u)
-            v_root = Find(v)
-            if u_root != v_root:
-                parent[u_root] = v_root
-
-        parent = [None] * g.order
+        union_find = UnionFind(g.order)
         kraph = cls("kruskal Union Find", g.vertices)
-        edges = sorted(g.edges, key=lambda e: e.weight)
+        kraph.tombstones = set(g.tombstones)
+        edges = sorted(g.edges_from_arcs(), key=lambda e: e.weight)
         for e in edges:
-            if Find(e.u) != Find(e.v):
+            if union_find.union(e.u, e.v):
                 kraph.add_edge(e)
-                Union(e.u, e.v)
+                if union_find.count == 1 + len(g.tombstones):  # the removed vertices stay alone
+                    break
 
         return kraph
 
@@ -286,15 +483,38 @@ class AbstractGraph(ABC):
             dist[sj] = dist[si] + w
             pred[sj] = si
 
-    def dijkstra(self, s0: int = 0, s1: int = None) -> (List[int], List[number]):
+    def dijkstra(self, s0: int = 0, s1: int = None, engine: str = "heap") -> (List[int], List[number]):
+        """
+        @param s0: source vertex
+        @param s1: target vertex. If given, return (path, cost) instead of (pred, dist)
+        @param engine: "heap" (binary heap), "naif" (linear search of the minimum)
+        or "bidirectional" (only with s1)
+        The results are kept in self.path_cache, which gives copies: the caller can modify them
+        """
+        result = self.path_cache.get(s0, s1, engine)
+        if result is not None:
+            self.expanded_nodes = 0
+            return result
+        if engine == "naif":
+            result = self.dijkstra_naif(s0, s1)
+        elif engine == "bidirectional" and s1 is not None:
+            result = self.bidirectional_dijkstra(s0, s1)
+        else:
+            result = self.dijkstra_heap(s0, s1)
+        self.path_cache.put(s0, s1, result, engine)
+        return result
+
+    def dijkstra_naif(self, s0: int = 0, s1: int = None) -> (List[int], List[number]):
         dist = [float('inf')] * self.order
         dist[s0] = 0
         pred = [None] * self.order
         F = list(range(self.order))
+        self.expanded_nodes = 0
 
         while F:
             si = min(F, key=lambda elt: dist[elt])
             F.remove(si)
+            self.expanded_nodes += 1
             for sj in self.successors(si):
                 self.relacher(si, sj, dist, pred)
             if s1 is not None and si == s1:
@@ -302,32 +522,394 @@ class AbstractGraph(ABC):
 
         return pred, dist
 
-    def BellmanFord(self, s0: int | str = 0):
+    def dijkstra_heap(self, s0: int = 0, s1: int = None) -> (List[int], List[number]):
+        """
+        Dijkstra with a binary heap and lazy deletion: a vertex can be pushed several times,
+        outdated entries are skipped when popped. Stops as soon as s1 is settled.
+        """
         dist = [float('inf')] * self.order
         dist[s0] = 0
         pred = [None] * self.order
-        F = list(range(self.order))
+        settled = [False] * self.order
+        heap = [(0, s0)]
+        self.expanded_nodes = 0
+
+        while heap:
+            d, si = heapq.heappop(heap)
+            if settled[si]:
+                continue
+            settled[si] = True
+            self.expanded_nodes += 1
+            if si == s1:
+                return AbstractGraph.path(pred, s0, s1), d
+            for sj, w in self.weighted_successors(si):
+                if d + w < dist[sj]:
+                    dist[sj] = d + w
+                    pred[sj] = si
+                    heapq.heappush(heap, (d + w, sj))
+
+        if s1 is not None:
+            return AbstractGraph.path(pred, s0, s1), dist[s1]
+        return pred, dist
+
+    def bidirectional_dijkstra(self, s0: int, s1: int) -> (List[int], number):
+        """
+        A dijkstra from s0 and a backward one from s1, alternately, until the sum of their next distances
+        can't beat the best path through a vertex reached by both
+        @return: (path, cost), like dijkstra(s0, s1)
+        """
+        dist = ({s0: 0}, {s1: 0})
+        pred = ({s0: None}, {s1: None})
+        settled = (set(), set())
+        heaps = ([(0, s0)], [(0, s1)])
+        best, meeting = float('inf'), None
+        self.expanded_nodes = 0
+
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < best:
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            self.expanded_nodes += 1
+            arcs = self.weighted_successors(u) if side == 0 else self.backward_successors(u)
+            for v, w in arcs:
+                if d + w < dist[side].get(v, float('inf')):
+                    dist[side][v] = d + w
+                    pred[side][v] = u
+                    heapq.heappush(heaps[side], (d + w, v))
+                    if v in dist[1 - side] and d + w + dist[1 - side][v] < best:
+                        best, meeting = d + w + dist[1 - side][v], v
+            if u in dist[1 - side] and d + dist[1 - side][u] < best:
+                best, meeting = d + dist[1 - side][u], u
+
+        if meeting is None:
+            print('no path found')
+            return False, float('inf')
+        return self.join_paths(pred[0], pred[1], meeting), best
+
+    def dijkstra_targets(self, s0: int, targets: Iterable[int]) -> (List[int], List[number]):
+        """
+        One to many dijkstra: stops as soon as every vertex of targets is settled.
+        The distances of the targets are final, the others may not be.
+        """
+        dist = [float('inf')] * self.order
+        dist[s0] = 0
+        pred = [None] * self.order
+        settled = [False] * self.order
+        remaining = set(targets)
+        heap = [(0, s0)]
+        self.expanded_nodes = 0
+
+        while heap and remaining:
+            d, si = heapq.heappop(heap)
+            if settled[si]:
+                continue
+            settled[si] = True
+            self.expanded_nodes += 1
+            remaining.discard(si)
+            for sj, w in self.weighted_successors(si):
+                if d + w < dist[sj]:
+                    dist[sj] = d + w
+                    pred[sj] = si
+                    heapq.heappush(heap, (d + w, sj))
 
-        for i in range(1, self.order - 1):
-            for e in self.edges:
-                self.relacher(e.u, e.v, dist, pred)
+        return pred, dist
 
-        for e in self.edges:
-            if dist[e.v] > dist[e.u] + e.weight:
-                print("circuit absorbant")
+    def dijkstra_multi_source(self, sources: Iterable[int]) -> (List[int], List[number], List[int]):
+        """
+        One dijkstra started from all the sources at once
+        @return: (pred, dist, origin) with dist[u] the distance from u to its nearest source origin[u]
+        """
+        dist = [float('inf')] * self.order
+        pred = [None] * self.order
+        origin = [None] * self.order
+        settled = [False] * self.order
+        heap = []
+        for s in sources:
+            if origin[s] is None:
+                dist[s] = 0
+                origin[s] = s
+                heap.append((0, s))
+        heapq.heapify(heap)
+        self.expanded_nodes = 0
+
+        while heap:
+            d, si = heapq.heappop(heap)
+            if settled[si]:
+                continue
+            settled[si] = True
+            self.expanded_nodes += 1
+            for sj, w in self.weighted_successors(si):
+                if d + w < dist[sj]:
+                    dist[sj] = d + w
+                    pred[sj] = si
+                    origin[sj] = origin[si]
+                    heapq.heappush(heap, (d + w, sj))
+
+        return pred, dist, origin
+
+    def repair_shortest_paths(self, s0: int, pred: List[int], dist: List[number],
+                              changes: Iterable[Tuple[int, int, number, number]]) -> set:
+        """
+        Update in place the complete shortest path tree (pred, dist) of s0 after some weights changed,
+        in the way of Ramalingam and Reps: only the vertices whose distance may change are visited.
+        @param changes: (u, v, old_weight, new_weight) of the modified edges, the graph already has the new weights
+        @return: the vertices whose distance or predecessor was updated
+        """
+        arcs = []
+        for u, v, old_weight, new_weight in changes:
+            arcs.append((u, v, old_weight, new_weight))
+            if not self.directed:
+                arcs.append((v, u, old_weight, new_weight))
+
+        # 1. an increased tree edge disconnects the subtree below it
+        affected = set()
+        for u, v, old_weight, new_weight in arcs:
+            if new_weight > old_weight and pred[v] == u and v not in affected:
+                pile = [v]
+                affected.add(v)
+                while pile:
+                    x = pile.pop()
+                    for y in self.successors(x):
+                        if pred[y] == x and y not in affected:
+                            affected.add(y)
+                            pile.append(y)
+
+        # 2. reconnect the affected vertices to the unaffected part of the tree
+        heap = []
+        for x in affected:
+            dist[x] = float('inf')
+            pred[x] = None
+        for x in affected:
+            if x == s0:
+                dist[x] = 0
+                heap.append((0, x))
+                continue
+            if self.directed:
+                incoming = [(y, self.get_Edge(y, x).weight) for y in self.predecessors(x)]
+            else:
+                incoming = self.weighted_successors(x)
+            for y, w in incoming:
+                if y not in affected and dist[y] + w < dist[x]:
+                    dist[x] = dist[y] + w
+                    pred[x] = y
+            if dist[x] < float('inf'):
+                heap.append((dist[x], x))
+
+        # 3. a decreased edge can give a shorter path to its end
+        updated = set(affected)
+        for u, v, old_weight, new_weight in arcs:
+            if new_weight < old_weight and dist[u] + new_weight < dist[v]:
+                dist[v] = dist[u] + new_weight
+                pred[v] = u
+                updated.add(v)
+                heap.append((dist[v], v))
+
+        # 4. propagate the new distances like dijkstra
+        heapq.heapify(heap)
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            for y, w in self.weighted_successors(x):
+                if d + w < dist[y]:
+                    dist[y] = d + w
+                    pred[y] = x
+                    updated.add(y)
+                    heapq.heappush(heap, (d + w, y))
+
+        return updated
+
+    def a_star(self, s0: int, s1: int, heuristic: Callable[[int, int], number]) -> (List[int], number):
+        """
+        @param heuristic: heuristic(u, s1) must never overestimate the cost from u to s1
+        @return: (path, cost), like dijkstra(s0, s1)
+        """
+        dist = [float('inf')] * self.order
+        dist[s0] = 0
+        pred = [None] * self.order
+        settled = [False] * self.order
+        heap = [(heuristic(s0, s1), s0)]
+        self.expanded_nodes = 0
+
+        while heap:
+            _, si = heapq.heappop(heap)
+            if settled[si]:
+                continue
+            settled[si] = True
+            self.expanded_nodes += 1
+            if si == s1:
                 break
+            d = dist[si]
+            for sj, w in self.weighted_successors(si):
+                if d + w < dist[sj]:
+                    dist[sj] = d + w
+                    pred[sj] = si
+                    heapq.heappush(heap, (d + w + heuristic(sj, s1), sj))
+
+        return AbstractGraph.path(pred, s0, s1), dist[s1]
+
+    def BellmanFord(self, s0: int = 0) -> (List[int], List[number], List[int]):
+        """
+        Shortest paths with negative weights. Stops at the first pass that changes nothing.
+        @return: (pred, dist, cycle) with cycle a negative cycle [v1, ..., vk] (arcs v1 -> v2 ... vk -> v1)
+        reachable from s0, or None if there is none (dist is then meaningless)
+        """
+        dist = [float('inf')] * self.order
+        dist[s0] = 0
+        pred = [None] * self.order
+        arcs = list(self.arcs())
+
+        for i in range(self.order):
+            last_changed = None
+            for u, v, w in arcs:
+                if dist[u] + w < dist[v]:
+                    dist[v] = dist[u] + w
+                    pred[v] = u
+                    last_changed = v
+            if last_changed is None:
+                return pred, dist, None
+
+        # still a change after order passes: there is a negative cycle
+        return pred, dist, self.negative_cycle(pred, last_changed)
+
+    def spfa(self, s0: int = 0, sources: Iterable[int] = None) -> (List[int], List[number], List[int]):
+        """
+        Queue based Bellman-Ford (Shortest Path Faster Algorithm): only the arcs leaving a vertex whose distance
+        changed are relaxed again.
+        @param sources: start from all these vertices at distance 0 instead of s0
+        @return: (pred, dist, cycle) like BellmanFord()
+        """
+        dist = [float('inf')] * self.order
+        pred = [None] * self.order
+        length = [0] * self.order  # number of arcs of the current path to each vertex
+        in_queue = [False] * self.order
+        file = deque([s0] if sources is None else sources)
+        for s in file:
+            dist[s] = 0
+            in_queue[s] = True
+
+        while file:
+            u = file.popleft()
+            in_queue[u] = False
+            for v, w in self.weighted_successors(u):
+                if dist[u] + w < dist[v]:
+                    dist[v] = dist[u] + w
+                    pred[v] = u
+                    length[v] = length[u] + 1
+                    if length[v] >= self.order:
+                        # a path with order arcs goes through a vertex twice: negative cycle
+                        return pred, dist, self.negative_cycle(pred, v)
+                    if not in_queue[v]:
+                        in_queue[v] = True
+                        file.append(v)
+
+        return pred, dist, None
 
-        return pred, dist
+    @staticmethod
+    def negative_cycle(pred: List[int], v: int) -> List[int]:
+        """
+        cycle of the predecessors found by going back from v
+        """
+        seen = set()
+        while v not in seen:
+            seen.add(v)
+            v = pred[v]
+        cycle = [v]
+        u = pred[v]
+        while u != v:
+            cycle.append(u)
+            u = pred[u]
+        cycle.reverse()
+        return cycle
+
+    def FloydWarshall(self, block_size: int = 256) -> (np.ndarray, np.ndarray):
+        """
+        All pairs shortest paths for dense or small graphs, O(n^3) with NumPy.
+        For each k, the rows are relaxed through k by blocks of block_size rows, so that the temporary arrays
+        stay in cache.
+        @return: (dist, next_hop) with next_hop[i, j] the vertex after i on the path to j (-1 if there is none),
+        see next_hop_path()
+        """
+        n = self.order
+        dist = np.full((n, n), np.inf)
+        next_hop = np.full((n, n), -1, dtype=np.int64)
+        np.fill_diagonal(dist, 0)
+        np.fill_diagonal(next_hop, np.arange(n))
+        for u, v, w in self.arcs():
+            if w < dist[u, v]:
+                dist[u, v] = w
+                next_hop[u, v] = v
+
+        for k in range(n):
+            row_k = dist[k].copy()
+            for start in range(0, n, block_size):
+                block = dist[start:start + block_size]
+                via_k = block[:, k, None] + row_k[None, :]
+                better = via_k < block
+                block[better] = via_k[better]
+                block_next_hop = next_hop[start:start + block_size]
+                block_next_hop[better] = np.broadcast_to(block_next_hop[:, k, None], better.shape)[better]
+
+        return dist, next_hop
+
+    def johnson(self) -> (np.ndarray, np.ndarray):
+        """
+        All pairs shortest paths for sparse graphs, O(n m log n): the weights are made positive with potentials
+        computed by Bellman-Ford (from a virtual vertex linked to every vertex), then a dijkstra runs from each vertex.
+        @return: (dist, next_hop) like FloydWarshall(), (None, None) if there is a negative cycle
+        """
+        n = self.order
+        adjacency = [list(self.weighted_successors(u)) for u in range(n)]
+
+        # potentials: distances from the virtual vertex, every vertex starts at 0
+        pred, h, cycle = self.spfa(sources=range(n))
+        if cycle is not None:
+            print("circuit absorbant")
+            return None, None
+
+        dist = np.full((n, n), np.inf)
+        next_hop = np.full((n, n), -1, dtype=np.int64)
+        for s in range(n):
+            reweighted_dist = [float('inf')] * n
+            reweighted_dist[s] = 0
+            pred = [None] * n
+            settled = [False] * n
+            order = []
+            heap = [(0, s)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if settled[u]:
+                    continue
+                settled[u] = True
+                order.append(u)
+                for v, w in adjacency[u]:
+                    nd = d + w + h[u] - h[v]
+                    if nd < reweighted_dist[v]:
+                        reweighted_dist[v] = nd
+                        pred[v] = u
+                        heapq.heappush(heap, (nd, v))
 
-    def FloydWarshall(self):
-        dist = [[float('inf')] * self.order] * self.order
-        pred = [[None] * self.order] * self.order
+            # the vertices are settled after their predecessor, so their first hop is already known
+            first_hop = [-1] * n
+            first_hop[s] = s
+            for v in order[1:]:
+                first_hop[v] = v if pred[v] == s else first_hop[pred[v]]
+            row = np.array(order, dtype=np.int64)
+            dist[s, row] = np.array([reweighted_dist[v] - h[s] + h[v] for v in order])
+            next_hop[s] = first_hop
 
-        for k in range(self.order):
-            for i in range(self.order):
-                for j in range(self.order):
-                    if dist[i][k] + dist[k][j] < dist[i][j]:
-                        dist[i][j] = dist[i][k] + dist[k][j]
-                        pred[i][j] = pred[k][j]
+        return dist, next_hop
 
-        return dist, pred
+    @staticmethod
+    def next_hop_path(next_hop: np.ndarray, s0: int, s1: int) -> List[int]:
+        """
+        path from s0 to s1 from the next_hop matrix of FloydWarshall() or johnson(), False if there is none
+        """
+        if next_hop[s0, s1] < 0:
+            return False
+        path = [s0]
+        while path[-1] != s1:
+            path.append(int(next_hop[path[-1], s1]))
+        return path
@@ -0,0 +1,230 @@
+import hashlib
+import heapq
+import pickle
+from array import array
+from typing import List, Tuple, Dict
+
+from model.lib_graph.abstractgraph import AbstractGraph, number
+
+
+class ContractionHierarchy:
+    """
+    Preprocessing of a graph whose weights don't change, to answer point to point queries quickly.
+    The vertices are contracted one by one (rank = contraction order): shortcuts replace the shortest paths
+    going through the contracted vertex. A query is then a bidirectional dijkstra that only goes up the ranks,
+    it settles a few hundred vertices even on large maps.
+    It only holds lists and dicts, so it can be pickled with save() and reused by another process with load().
+    The fingerprint of the graph is saved with it, matches() tells if a loaded hierarchy belongs to a graph.
+    """
+    def __init__(self, rank: List[int], up: List[List[Tuple[int, number]]], down: List[List[Tuple[int, number]]],
+                 middle: Dict[Tuple[int, int], int], fingerprint: Tuple[int, int, str] = None):
+        """
+        @param rank: contraction order of each vertex
+        @param up: up[u] = (v, weight) for the arcs u -> v with rank[v] > rank[u]
+        @param down: down[v] = (u, weight) for the arcs u -> v with rank[u] > rank[v]
+        @param middle: middle[(u, v)] is the contracted vertex a shortcut u -> v goes through
+        @param fingerprint: fingerprint() of the graph the hierarchy was built from
+        """
+        self.rank = rank
+        self.up = up
+        self.down = down
+        self.middle = middle
+        self.fingerprint = fingerprint
+        self.expanded_nodes = 0
+
+    @staticmethod
+    def fingerprint_of(g: AbstractGraph) -> Tuple[int, int, str]:
+        """
+        (order, number of arcs, hash of the arcs and of their weights) of the graph
+        """
+        ends = array('q')
+        weights = array('d')
+        for u, v, w in g.arcs():
+            ends.append(u)
+            ends.append(v)
+            weights.append(w)
+        digest = hashlib.sha1(ends.tobytes())
+        digest.update(weights.tobytes())
+        return g.order, len(weights), digest.hexdigest()
+
+    def matches(self, g: AbstractGraph) -> bool:
+        """
+        True if the hierarchy was built from a graph with the same arcs and weights as g
+        """
+        return self.fingerprint is not None and self.fingerprint == self.fingerprint_of(g)
+
+    @classmethod
+    def build(cls, g: AbstractGraph, witness_limit: int = 60, estimate_limit: int = 8) -> 'ContractionHierarchy':
+        """
+        @param witness_limit: number of vertices a witness search can settle. Lower is faster to build
+        but adds useless shortcuts
+        @param estimate_limit: the same for the searches that only estimate the priority of a vertex
+        """
+        n = g.order
+        out: List[Dict[int, number]] = [{} for _ in range(n)]
+        inc: List[Dict[int, number]] = [{} for _ in range(n)]
+        for u, v, w in g.arcs():
+            if u != v and w < out[u].get(v, float('inf')):
+                out[u][v] = w
+                inc[v][u] = w
+
+        middle = {}
+        rank = [0] * n
+        up = [[] for _ in range(n)]
+        down = [[] for _ in range(n)]
+        deleted_neighbours = [0] * n
+
+        def witness_search(source: int, excluded: int, targets: set, max_cost: number, limit: int) -> Dict:
+            # bounded dijkstra avoiding the vertex to contract, stops once the targets are settled
+            dist = {source: 0}
+            heap = [(0, source)]
+            settled = 0
+            inf = float('inf')
+            while heap and targets:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                settled += 1
+                if d > max_cost or settled > limit:
+                    break
+                targets.discard(x)
+                for y, w in out[x].items():
+                    dy = d + w
+                    if y != excluded and dy < dist.get(y, inf):
+                        dist[y] = dy
+                        heapq.heappush(heap, (dy, y))
+            return dist
+
+        def shortcuts(v: int, limit: int) -> List[Tuple[int, int, number]]:
+            result = []
+            for u, w_u in inc[v].items():
+                # in a non directed graph the shortcut w -> u is the reverse of u -> w, search only once
+                targets = {w for w in out[v] if w != u and (g.directed or w > u)}
+                if not targets:
+                    continue
+                dist = witness_search(u, v, set(targets), w_u + max(out[v][w] for w in targets), limit)
+                for w in targets:
+                    cost = w_u + out[v][w]
+                    if dist.get(w, float('inf')) > cost:
+                        result.append((u, w, cost))
+                        if not g.directed:
+                            result.append((w, u, cost))
+            return result
+
+        def priority(v: int) -> int:
+            # edge difference + number of contracted neighbours, to contract uniformly across the graph.
+            # The number of shortcuts is estimated with short witness searches
+            return len(shortcuts(v, estimate_limit)) - len(inc[v]) - len(out[v]) + deleted_neighbours[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        # the priority of a vertex only changes when one of its neighbours is contracted
+        outdated = [False] * n
+        next_rank = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # lazy update: compute the priority again only if it is outdated
+            if outdated[v]:
+                outdated[v] = False
+                p = priority(v)
+                if heap and p > heap[0][0]:
+                    heapq.heappush(heap, (p, v))
+                    continue
+
+            for u, w, cost in shortcuts(v, witness_limit):
+                if cost < out[u].get(w, float('inf')):
+                    out[u][w] = cost
+                    inc[w][u] = cost
+                    middle[(u, w)] = v
+
+            rank[v] = next_rank
+            next_rank += 1
+            up[v] = list(out[v].items())
+            down[v] = list(inc[v].items())
+            for w in out[v]:
+                del inc[w][v]
+                deleted_neighbours[w] += 1
+                outdated[w] = True
+            for u in inc[v]:
+                del out[u][v]
+                deleted_neighbours[u] += 1
+                outdated[u] = True
+            out[v] = {}
+            inc[v] = {}
+
+        return cls(rank, up, down, middle, cls.fingerprint_of(g))
+
+    def query(self, s: int, t: int) -> (List[int], number):
+        """
+        @return: (path, cost) from s to t, like AbstractGraph.dijkstra(s, t). (False, inf) if there is no path
+        """
+        dist = ({s: 0}, {t: 0})
+        pred = ({s: None}, {t: None})
+        heaps = ([(0, s)], [(0, t)])
+        graphs = (self.up, self.down)
+        best, meeting = float('inf'), None
+        self.expanded_nodes = 0
+
+        while heaps[0] or heaps[1]:
+            # each search stops once its next vertex can't give a shorter path
+            for side in (0, 1):
+                heap = heaps[side]
+                if heap and heap[0][0] >= best:
+                    heap.clear()
+                if not heap:
+                    continue
+                d, x = heapq.heappop(heap)
+                if d > dist[side][x]:
+                    continue
+                self.expanded_nodes += 1
+                other = dist[1 - side].get(x)
+                if other is not None and d + other < best:
+                    best, meeting = d + other, x
+                for y, w in graphs[side][x]:
+                    if d + w < dist[side].get(y, float('inf')):
+                        dist[side][y] = d + w
+                        pred[side][y] = x
+                        heapq.heappush(heap, (d + w, y))
+
+        if meeting is None:
+            return False, float('inf')
+
+        # arcs of the path in the hierarchy, from s to t
+        arcs = []
+        x = meeting
+        while pred[0][x] is not None:
+            arcs.append((pred[0][x], x))
+            x = pred[0][x]
+        arcs.reverse()
+        x = meeting
+        while pred[1][x] is not None:
+            arcs.append((x, pred[1][x]))
+            x = pred[1][x]
+
+        return self.unpack(s, arcs), best
+
+    def unpack(self, s: int, arcs: List[Tuple[int, int]]) -> List[int]:
+        """
+        replace the shortcuts by the vertices they go through
+        """
+        path = [s]
+        pile = list(reversed(arcs))
+        while pile:
+            u, v = pile.pop()
+            m = self.middle.get((u, v))
+            if m is None:
+                path.append(v)
+            else:
+                pile.append((m, v))
+                pile.append((u, m))
+        return path
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, "wb") as file:
+            pickle.dump((self.rank, self.up, self.down, self.middle, self.fingerprint), file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'ContractionHierarchy':
+        with open(file_path, "rb") as file:
+            return cls(*pickle.load(file))
@@ -0,0 +1,160 @@
+from array import array
+from typing import List, Iterable, Tuple
+
+import numpy as np
+
+from model.lib_graph.abstractgraph import AbstractGraph, Vertex, Edge, number
+
+
+# numpy type of the stdlib arrays of a GraphCSR
+NUMPY_TYPES = {'q': np.int64, 'i': np.int32, 'd': np.float64}
+
+
+class GraphCSR(AbstractGraph):
+    """
+    Static graph stored in compressed sparse row format: the successors of u are
+    targets[offsets[u]:offsets[u + 1]] and the weights of the edges leading to them are at the same positions in weights.
+    An edge of a non directed graph is stored in both directions.
+    The flat arrays cost a few bytes per edge instead of an Edge object, but the graph can't be modified once built.
+    """
+    def __init__(self, name: str, vertices: List[Vertex], offsets: array, targets: array, weights: array,
+                 directed: bool = False):
+        AbstractGraph.__init__(self, name, vertices, directed)
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.reverse = None  # (offsets, sources) of the reversed graph, built on the first call to predecessors()
+
+    @classmethod
+    def from_edges(cls, name: str, vertices: List[Vertex], us: Iterable[int], vs: Iterable[int],
+                   weights: Iterable[number] = None, directed: bool = False) -> 'GraphCSR':
+        """
+        Build the graph from the arrays of the edges ends (us[k], vs[k]) and their weights (1 by default).
+        The arcs are sorted by their first end with numpy, without a Python object per arc
+        """
+        us = np.asarray(us, dtype=np.int32)
+        vs = np.asarray(vs, dtype=np.int32)
+        weights = np.ones(len(us)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if not directed:
+            us, vs = np.concatenate((us, vs)), np.concatenate((vs, us))
+            weights = np.concatenate((weights, weights))
+
+        # stable: the successors of a vertex keep the order of the edges
+        order = np.argsort(us, kind="stable")
+        offsets = cls._to_array('q', cls._offsets(len(vertices), us))
+        del us
+        targets = cls._to_array('i', vs, order)
+        del vs
+        weights = cls._to_array('d', weights, order)
+
+        return cls(name, vertices, offsets, targets, weights, directed)
+
+    @classmethod
+    def from_graph(cls, g: AbstractGraph) -> 'GraphCSR':
+        us, vs, weights = array('i'), array('i'), array('d')
+        for u, v, w in g.arcs():
+            us.append(u)
+            vs.append(v)
+            weights.append(w)
+        # arcs() already gives both directions of a non directed edge
+        graph = cls.from_edges(g.name, g.vertices, np.frombuffer(us, dtype=np.int32),
+                               np.frombuffer(vs, dtype=np.int32), np.frombuffer(weights, dtype=np.float64),
+                               directed=True)
+        graph.directed = g.directed
+        return graph
+
+    @staticmethod
+    def _offsets(order: int, us: np.ndarray) -> np.ndarray:
+        """
+        offsets[u] is the number of elements of us lower than u
+        """
+        offsets = np.zeros(order + 1, dtype=np.int64)
+        np.cumsum(np.bincount(us, minlength=order), out=offsets[1:])
+        return offsets
+
+    @staticmethod
+    def _to_array(typecode: str, values: np.ndarray, order: np.ndarray = None) -> array:
+        """
+        stdlib array of values (or of values[order]), written in place without an intermediate copy.
+        The successors are read with slices of stdlib arrays, faster than numpy for small slices
+        """
+        result = array(typecode, [0]) * len(values)
+        view = np.frombuffer(result, dtype=NUMPY_TYPES[typecode])
+        if order is None:
+            view[:] = values
+        else:
+            np.take(values, order, out=view)
+        return result
+
+    # methods for vertices
+
+    def predecessors(self, v: int) -> List[int]:
+        if not self.directed:
+            print("Don't use predecessors() in a non directed graph")
+            return
+        if self.reverse is None:
+            offsets = np.frombuffer(self.offsets, dtype=np.int64)
+            vs = np.frombuffer(self.targets, dtype=np.int32)
+            us = np.repeat(np.arange(self.order, dtype=np.int32), np.diff(offsets))
+            sources = self._to_array('i', us, np.argsort(vs, kind="stable"))
+            self.reverse = (self._to_array('q', self._offsets(self.order, vs)), sources)
+        offsets, sources = self.reverse
+        return sources[offsets[v]:offsets[v + 1]].tolist()
+
+    def successors(self, v: int) -> List[int]:
+        return self.targets[self.offsets[v]:self.offsets[v + 1]].tolist()
+
+    def weighted_successors(self, u: int) -> Iterable[Tuple[int, number]]:
+        a, b = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[a:b], self.weights[a:b])
+
+    def degree(self, v: int, _in: bool = False, out: bool = False) -> int:
+        out_degree = self.offsets[v + 1] - self.offsets[v]
+        if self.directed:
+            if _in:
+                return len(self.predecessors(v))
+            if out:
+                return out_degree
+            return out_degree + len(self.predecessors(v))
+        else:
+            return out_degree
+
+    def add_vertex(self, v: Vertex) -> None:
+        raise TypeError("GraphCSR can't be modified, build a new one")
+
+    def remove_vertex(self, v: int) -> None:
+        raise TypeError("GraphCSR can't be modified, build a new one")
+
+    def v_index(self, name: str) -> int:
+        for i, v in enumerate(self.vertices):
+            if v.name == name:
+                return i
+
+    # methods for edges
+
+    def add_edge(self, e: Edge) -> None:
+        raise TypeError("GraphCSR can't be modified, build a new one")
+
+    def remove_edge(self, e: Edge) -> None:
+        raise TypeError("GraphCSR can't be modified, build a new one")
+
+    def has_edge(self, v1: int, v2: int) -> bool:
+        return v2 in self.targets[self.offsets[v1]:self.offsets[v1 + 1]]
+
+    def get_Edge(self, u: int, v: int) -> Edge:
+        for p in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[p] == v:
+                return Edge(u, v, self.weights[p])
+        raise KeyError((u, v))
+
+    def weight(self):
+        total = sum(self.weights)
+        return total if self.directed else total / 2
+
+    def print(self) -> None:
+        print(self.name)
+        for v in range(self.order):
+            v_name = self.vertices[v].name
+            successors_name = [self.vertices[i].name for i in self.successors(v)]
+            print(v_name, " : ", successors_name)
+        print()
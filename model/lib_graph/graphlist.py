@@ -1,22 +1,38 @@
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Iterable
 
-from model.lib_graph.abstractgraph import AbstractGraph, Vertex, Edge
+from model.lib_graph.abstractgraph import AbstractGraph, Vertex, Edge, number
 
 
 class GraphList(AbstractGraph):
-    def __init__(self, name: str, vertices: List[Vertex], directed: bool = False):
+    def __init__(self, name: str, vertices: List[Vertex], directed: bool = False, reverse_index: bool = False):
+        """
+        @param reverse_index: keep the predecessors of every vertex of a directed graph up to date,
+        then predecessors() and the in degree don't have to scan every successors list
+        """
         AbstractGraph.__init__(self, name, vertices, directed)
         self.successors_list = [[] for i in range(self.order)]
+        self.predecessors_list = [[] for i in range(self.order)] if directed and reverse_index else None
+        # edges_list[u][k] is the edge between u and successors_list[u][k]
+        self.edges_list: List[List[Edge]] = [[] for i in range(self.order)]
+        # (u, v) of every edge, with u <= v in a non directed graph
+        self.edges_keys = set()
+        # name -> index of the vertices, built on the first call to v_index()
+        self.names: Dict[str, int] = None
 
     def predecessors(self, v: int) -> List[int]:
         if not self.directed:
             print("Don't use predecessors() in a non directed graph")
             return
+        if self.predecessors_list is not None:
+            return self.predecessors_list[v]
         return [u for u, successors in enumerate(self.successors_list) if v in successors]
 
     def successors(self, v: int) -> List[int]:
         return self.successors_list[v]
 
+    def weighted_successors(self, u: int) -> Iterable[Tuple[int, number]]:
+        return zip(self.successors_list[u], [e.weight for e in self.edges_list[u]])
+
     def degree(self, v: int, _in: bool = False, out: bool = False) -> int:
         if self.directed:
             if _in:
@@ -29,44 +45,166 @@ class GraphList(AbstractGraph):
 
     def add_vertex(self, v: Vertex) -> None:
         self.order += 1
+        self.version += 1
         self.vertices.append(v)
         self.successors_list.append([])
+        self.edges_list.append([])
+        if self.predecessors_list is not None:
+            self.predecessors_list.append([])
+        if self.names is not None:
+            self.names.setdefault(v.name, self.order - 1)
 
     def remove_vertex(self, v: int) -> None:
-        self.vertices.pop(v)
-        self.order -= 1
-        del self.successors_list[v]
-        for u, successors in enumerate(self.successors_list):
-            if v in successors:
-                successors.remove(v)
-            self.successors_list[u] = [s if s < v else s-1 for s in successors]
+        """
+        Remove the edges of v and mark it as removed (self.tombstones). The other vertices keep their index:
+        v stays without edges until compact() renumbers the graph. The traversals, the components,
+        the topological sorts and the spanning trees skip it, the other algorithms work on self.order vertices
+        and give it no predecessor and an infinite distance
+        """
+        if v in self.tombstones:
+            return
+        self.version += 1
+        for e in {id(e): e for e in self.edges_list[v]}.values():  # a loop is twice in the list
+            self.remove_edge(e)
+        if self.directed:
+            for u in list(self.predecessors(v)):
+                self.remove_edge(self.get_Edge(u, v))
+        if self.names is not None and self.names.get(self.vertices[v].name) == v:
+            del self.names[self.vertices[v].name]
+        self.tombstones.add(v)
+
+    def compact(self) -> List[int]:
+        """
+        Drop the removed vertices and renumber the others, in O(V + E)
+        @return: new_index, new_index[v] is the new index of the vertex v, None if it was removed
+        """
+        if not self.tombstones:
+            return list(range(self.order))
+        self.version += 1
+        new_index = [None] * self.order
+        kept = [v for v in range(self.order) if v not in self.tombstones]
+        for k, v in enumerate(kept):
+            new_index[v] = k
+
+        # the edges may be shared with another graph (kruskal), so renumbered copies are made
+        new_edges = {}
+        for e in self.edges:
+            new_edges[id(e)] = Edge(new_index[e.u], new_index[e.v], e.weight)
+        self.edges = list(new_edges.values())
+        self.edges_index = {(e.u, e.v): k for k, e in enumerate(self.edges)}
+        self.edges_keys = {self.edge_key(e.u, e.v) for e in self.edges}
+        self.edges_list = [[new_edges[id(e)] for e in self.edges_list[v]] for v in kept]
+        self.successors_list = [[new_index[s] for s in self.successors_list[v]] for v in kept]
+        if self.predecessors_list is not None:
+            self.predecessors_list = [[new_index[p] for p in self.predecessors_list[v]] for v in kept]
+        self.vertices = [self.vertices[v] for v in kept]
+        self.order = len(kept)
+        self.names = None
+        self.tombstones = set()
+        return new_index
 
     def v_index(self, name: str) -> int:
-        for i, v in enumerate(self.vertices):
-            if v.name == name:
-                return i
+        if self.names is None:
+            # the first vertex with this name wins
+            self.names = {v.name: i for i, v in reversed(list(enumerate(self.vertices))) if i not in self.tombstones}
+        return self.names.get(name)
+
+    def edge_key(self, u: int, v: int) -> Tuple[int, int]:
+        if self.directed or u <= v:
+            return u, v
+        return v, u
 
     def add_edge(self, e: Edge) -> None:
-        if e in self.edges:
+        key = self.edge_key(e.u, e.v)
+        if key in self.edges_keys:
             return
+        self.edges_keys.add(key)
+        self.version += 1
         self.edges_index[(e.u, e.v)] = len(self.edges)
         self.edges.append(e)
         if self.directed:
             self.successors_list[e.u].append(e.v)
+            self.edges_list[e.u].append(e)
+            if self.predecessors_list is not None:
+                self.predecessors_list[e.v].append(e.u)
         else:
             self.successors_list[e.u].append(e.v)
+            self.edges_list[e.u].append(e)
             self.successors_list[e.v].append(e.u)
+            self.edges_list[e.v].append(e)
 
     def add_edges(self, edges: List[Tuple[str, str]]) -> None:
-        for e in edges:
-            u, v = e
+        for u, v in edges:
             self.add_edge(Edge(self.v_index(u), self.v_index(v)))
 
+    def add_edges_from(self, us: Iterable, vs: Iterable[int] = None, weights: Iterable[number] = None) -> None:
+        """
+        Add many edges in one pass
+        @param us: the first ends of the edges, or the (u, v) pairs if vs is None. Lists or arrays
+        @param vs: the second ends of the edges
+        @param weights: the weights of the edges, 1 by default
+        """
+        if vs is None:
+            pairs = us.tolist() if hasattr(us, "tolist") else list(us)
+            us, vs = [u for u, v in pairs], [v for u, v in pairs]
+        us = us.tolist() if hasattr(us, "tolist") else list(us)
+        vs = vs.tolist() if hasattr(vs, "tolist") else list(vs)
+        if weights is None:
+            weights = [1] * len(us)
+        elif hasattr(weights, "tolist"):
+            weights = weights.tolist()
+
+        self.version += 1
+        keys = self.edges_keys
+        edges = self.edges
+        edges_index = self.edges_index
+        successors_list = self.successors_list
+        edges_list = self.edges_list
+        predecessors_list = self.predecessors_list
+        for u, v, weight in zip(us, vs, weights):
+            key = (u, v) if self.directed or u <= v else (v, u)
+            if key in keys:
+                continue
+            keys.add(key)
+            e = Edge(u, v, weight)
+            edges_index[(u, v)] = len(edges)
+            edges.append(e)
+            successors_list[u].append(v)
+            edges_list[u].append(e)
+            if not self.directed:
+                successors_list[v].append(u)
+                edges_list[v].append(e)
+            elif predecessors_list is not None:
+                predecessors_list[v].append(u)
+
     def remove_edge(self, e: Edge) -> None:
-        self.edges.remove(e)
-        self.successors_list[e.u].remove(e.v)
+        """
+        The last edge of self.edges takes the place of the removed one, so only its index changes
+        """
+        k = self.edges_index.pop((e.u, e.v), None)
+        if k is None and not self.directed:
+            k = self.edges_index.pop((e.v, e.u), None)
+        if k is None:
+            print("no edge between", e.u, "and", e.v)
+            return
+        self.version += 1
+        removed = self.edges[k]
+        last = self.edges.pop()
+        if k < len(self.edges):
+            self.edges[k] = last
+            self.edges_index[(last.u, last.v)] = k
+        u, v = removed.u, removed.v
+        self.edges_keys.discard(self.edge_key(u, v))
+        self._unlink(u, v)
         if not self.directed:
-            self.successors_list[e.v].remove(e.u)
+            self._unlink(v, u)
+        elif self.predecessors_list is not None:
+            self.predecessors_list[v].remove(u)
+
+    def _unlink(self, u: int, v: int) -> None:
+        k = self.successors_list[u].index(v)
+        del self.successors_list[u][k]
+        del self.edges_list[u][k]
 
     def has_edge(self, v1: int, v2: int) -> bool:
         if v2 in self.successors(v1):
@@ -79,6 +217,8 @@ class GraphList(AbstractGraph):
     def print(self) -> None:
         print(self.name)
         for v, successors in enumerate(self.successors_list):
+            if v in self.tombstones:
+                continue
             v_name = self.vertices[v].name
             successors_name = [self.vertices[i].name for i in successors]
             print(v_name, " : ", successors_name)
@@ -0,0 +1,72 @@
+import heapq
+from array import array
+from typing import List
+
+from model.lib_graph.abstractgraph import AbstractGraph, number
+
+
+class Landmarks:
+    """
+    ALT heuristic (A*, Landmarks, Triangle inequality) for any weighted graph.
+    The distances between a few landmarks and every vertex are computed once, then
+    d(u, t) >= d(L, t) - d(L, u) and d(u, t) >= d(u, L) - d(t, L) for every landmark L give a lower bound
+    of the cost from u to t. Memory: one array of order floats per landmark (two in a directed graph).
+    """
+    def __init__(self, g: AbstractGraph, nb_landmarks: int = 4, s0: int = 0):
+        """
+        @param nb_landmarks: more landmarks give a better heuristic but cost memory and preprocessing
+        @param s0: the first landmark is the vertex the farthest from s0
+        """
+        self.graph = g
+        self.landmarks: List[int] = []
+        self.dist_from: List[array] = []  # dist_from[k][v] = d(landmarks[k], v)
+        self.dist_to: List[array] = []  # dist_to[k][v] = d(v, landmarks[k])
+
+        # farthest point selection: each landmark is the vertex the farthest from the previous ones
+        pred, dist = g.dijkstra_heap(s0)
+        min_dist = list(dist)
+        for _ in range(min(nb_landmarks, g.order)):
+            candidates = [v for v in range(g.order) if 0 < min_dist[v] < float('inf')]
+            if not candidates:
+                break
+            landmark = max(candidates, key=lambda v: min_dist[v])
+            pred, dist = g.dijkstra_heap(landmark)
+            self.landmarks.append(landmark)
+            self.dist_from.append(array('d', dist))
+            self.dist_to.append(array('d', self.reverse_dijkstra(landmark)) if g.directed else self.dist_from[-1])
+            min_dist = [min(a, b) for a, b in zip(min_dist, dist)]
+
+    def reverse_dijkstra(self, t: int) -> List[number]:
+        """
+        distances from every vertex to t, following the arcs backwards
+        """
+        g = self.graph
+        dist = [float('inf')] * g.order
+        dist[t] = 0
+        heap = [(0, t)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for u in g.predecessors(v):
+                w = g.get_Edge(u, v).weight
+                if d + w < dist[u]:
+                    dist[u] = d + w
+                    heapq.heappush(heap, (d + w, u))
+        return dist
+
+    def heuristic(self, u: int, t: int) -> number:
+        inf = float('inf')
+        h = 0
+        for dist_from, dist_to in zip(self.dist_from, self.dist_to):
+            if dist_from[t] < inf and dist_from[u] < inf:
+                h = max(h, dist_from[t] - dist_from[u])
+            if dist_to[u] < inf and dist_to[t] < inf:
+                h = max(h, dist_to[u] - dist_to[t])
+        return h
+
+    def query(self, s: int, t: int) -> (List[int], number):
+        """
+        @return: (path, cost), like AbstractGraph.dijkstra(s, t)
+        """
+        return self.graph.a_star(s, t, self.heuristic)
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class PathCache:
+    """
+    Bounded LRU cache of shortest path results (paths, trees and costs) of a graph,
+    keyed by (source, target, profile). profile tells how the result was computed.
+    The graph increments its version on every change of its edges or weights,
+    the cache is emptied as soon as it sees a new version.
+    The lists and dicts of a result are copied when it is stored and when it is given back,
+    so a caller can modify what it gets without changing the cached result.
+    """
+    def __init__(self, graph: 'AbstractGraph', maxsize: int = 64):
+        self.graph = graph
+        self.maxsize = maxsize
+        self.version = graph.version
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self) -> None:
+        if self.version != self.graph.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = self.graph.version
+
+    def get(self, source: Hashable, target: Hashable, profile: Hashable = "default") -> Any:
+        """
+        cached result, None if there is none
+        """
+        self._check_version()
+        key = (source, target, profile)
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.copy_result(self.entries[key])
+
+    def put(self, source: Hashable, target: Hashable, result: Any, profile: Hashable = "default") -> None:
+        self._check_version()
+        key = (source, target, profile)
+        self.entries[key] = self.copy_result(result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def copy_result(result: Any) -> Any:
+        """
+        copy of the lists and dicts of a result: (pred, dist), (path, cost), ...
+        """
+        if isinstance(result, tuple):
+            return tuple(x.copy() if isinstance(x, (list, dict)) else x for x in result)
+        if isinstance(result, (list, dict)):
+            return result.copy()
+        return result
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self.entries),
+        }
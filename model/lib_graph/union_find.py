@@ -0,0 +1,38 @@
+from array import array
+
+
+class UnionFind:
+    """
+    Disjoint sets of the integers 0..n-1, stored in arrays.
+    find() is iterative with path halving and union() attaches the smaller tree under the bigger one,
+    so both run in near constant amortized time without recursion.
+    """
+    def __init__(self, n: int):
+        self.parent = array('q', range(n))
+        self.size = array('q', [1]) * n
+        self.count = n  # number of disjoint sets
+
+    def find(self, v: int) -> int:
+        parent = self.parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(self, u: int, v: int) -> bool:
+        """
+        merge the sets of u and v, return False if they were already in the same set
+        """
+        u_root = self.find(u)
+        v_root = self.find(v)
+        if u_root == v_root:
+            return False
+        if self.size[u_root] < self.size[v_root]:
+            u_root, v_root = v_root, u_root
+        self.parent[v_root] = u_root
+        self.size[u_root] += self.size[v_root]
+        self.count -= 1
+        return True
+
+    def connected(self, u: int, v: int) -> bool:
+        return self.find(u) == self.find(v)
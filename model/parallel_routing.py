@@ -0,0 +1,110 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Dict, Tuple
+
+from model.lib_graph.abstractgraph import AbstractGraph, number
+from model.lib_graph.graphcsr import GraphCSR
+from model.town_routes import town_pairs
+
+# arrays of the graph in the worker processes, set by _attach()
+_shared: Dict[str, SharedMemory] = {}
+_arrays: Dict[str, memoryview] = {}
+
+
+def _attach(blocks: Dict[str, Tuple[str, str, int]]) -> None:
+    """
+    initializer of the workers: attach the shared memory blocks {key: (name, typecode, nbytes)}
+    """
+    for key, (name, typecode, nbytes) in blocks.items():
+        shm = SharedMemory(name=name)
+        _shared[key] = shm
+        _arrays[key] = shm.buf[:nbytes].cast(typecode)
+
+
+def _search(source: int, targets: List[int]) -> Tuple[List[number], List[List[int]], int]:
+    """
+    dijkstra from source on the shared CSR arrays, stopped once the targets are settled
+    @return: the costs and the paths to each target, and the number of settled vertices
+    """
+    offsets, graph_targets, weights = _arrays["offsets"], _arrays["targets"], _arrays["weights"]
+    dist = {source: 0}
+    pred = {source: None}
+    settled = set()
+    remaining = set(targets)
+    heap = [(0, source)]
+    while heap and remaining:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        remaining.discard(u)
+        for p in range(offsets[u], offsets[u + 1]):
+            v = graph_targets[p]
+            if d + weights[p] < dist.get(v, float('inf')):
+                dist[v] = d + weights[p]
+                pred[v] = u
+                heapq.heappush(heap, (d + weights[p], v))
+
+    costs, paths = [], []
+    for target in targets:
+        costs.append(dist.get(target, float('inf')))
+        if target not in pred:
+            paths.append(False)
+            continue
+        path = []
+        v = target
+        while v is not None:
+            path.append(v)
+            v = pred[v]
+        path.reverse()
+        paths.append(path)
+    return costs, paths, len(settled)
+
+
+class ParallelTownRoutes:
+    """
+    Costs and paths between every pair of towns, like TownRoutes, computed by a pool of processes,
+    one search per town. The graph is converted once to CSR arrays published through shared memory,
+    so the tasks only send the town indexes and receive the costs and paths.
+    There are no trees, so the routes can't be repaired: compute them again after a change of the map.
+    """
+    def __init__(self, graph: AbstractGraph, towns: List[int], workers: int = None):
+        """
+        @param workers: number of processes, the number of cores by default
+        """
+        self.graph = graph
+        self.towns = towns
+        self.expanded_nodes = 0
+        self.paths: List[List[List[int]]] = []
+        self.costs: List[List[number]] = []
+
+        csr = graph if isinstance(graph, GraphCSR) else GraphCSR.from_graph(graph)
+        blocks = {}
+        shared = []
+        try:
+            for key, values in (("offsets", csr.offsets), ("targets", csr.targets), ("weights", csr.weights)):
+                data = values.tobytes()
+                shm = SharedMemory(create=True, size=max(len(data), 1))
+                shm.buf[:len(data)] = data
+                shared.append(shm)
+                blocks[key] = (shm.name, values.typecode, len(data))
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(blocks,)) as executor:
+                for costs, paths, settled in executor.map(_search, towns, [towns] * len(towns)):
+                    self.costs.append(costs)
+                    self.paths.append(paths)
+                    self.expanded_nodes += settled
+        finally:
+            for shm in shared:
+                shm.close()
+                shm.unlink()
+
+    def path(self, i: int, j: int) -> List[int]:
+        """
+        path from towns[i] to towns[j], False if there is none
+        """
+        return self.paths[i][j]
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        return town_pairs(self.towns)
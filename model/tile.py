@@ -1,12 +1,67 @@
-from typing import Tuple
+from typing import Tuple, Iterator
 
 from model.lib_graph.vertex import Vertex
 
 
 class Tile(Vertex):
-    def __init__(self, coord: Tuple[int, int], ground: str, altitude: int, town: bool = False, name: str = "not named tile"):
-        Vertex.__init__(self, name)
-        self.ground = ground
-        self.altitude = altitude
-        self.coord = coord
-        self.town = town
+    """
+    View on the tile i of a HexGrid. The grid stores its tiles in arrays (ground code, altitude, town),
+    a Tile is created on demand and reads and writes them.
+    """
+    def __init__(self, grid: 'HexGrid', i: int):
+        self.grid = grid
+        self.i = i
+
+    @property
+    def name(self) -> str:
+        return str(self.coord)
+
+    @property
+    def coord(self) -> Tuple[int, int]:
+        return self.grid.i_2_coord(self.i)
+
+    @property
+    def ground(self) -> str:
+        return self.grid.get_ground(self.i)
+
+    @ground.setter
+    def ground(self, ground: str) -> None:
+        self.grid.set_ground(self.i, ground)
+
+    @property
+    def altitude(self) -> int:
+        return int(self.grid.altitudes[self.i])
+
+    @altitude.setter
+    def altitude(self, altitude: int) -> None:
+        self.grid.set_altitude(self.i, altitude)
+
+    @property
+    def town(self) -> bool:
+        return bool(self.grid.town_map[self.i])
+
+    @town.setter
+    def town(self, town: bool) -> None:
+        self.grid.town_map[self.i] = town
+
+
+class Tiles:
+    """
+    Sequence of the tiles of a HexGrid, the Tile views are created on demand
+    """
+    def __init__(self, grid: 'HexGrid'):
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.width * self.grid.height
+
+    def __getitem__(self, i: int) -> Tile:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return Tile(self.grid, i)
+
+    def __iter__(self) -> Iterator[Tile]:
+        for i in range(len(self)):
+            yield Tile(self.grid, i)
@@ -0,0 +1,75 @@
+from typing import List, Tuple
+
+from model.lib_graph.abstractgraph import AbstractGraph, number
+
+
+def town_pairs(towns: List[int]) -> List[Tuple[int, int]]:
+    """
+    pairs (i, j) with i < j of distinct towns
+    """
+    k = len(towns)
+    return [(i, j) for i in range(k) for j in range(i + 1, k) if towns[i] != towns[j]]
+
+
+class TownRoutes:
+    """
+    Routes between every pair of towns, computed with one dijkstra per town instead of one per pair.
+    costs[i][j] is the cost from towns[i] to towns[j]. Paths are rebuilt from the predecessor trees only when asked.
+    The trees are kept in the path cache of the graph.
+    version is the version of the graph the routes are valid for, like in PathCache.
+    """
+    def __init__(self, graph: AbstractGraph, towns: List[int], full_trees: bool = False):
+        """
+        @param full_trees: compute the complete shortest path trees instead of stopping once the towns are reached.
+        They can then be updated with repair() when weights change
+        """
+        self.graph = graph
+        self.towns = towns
+        self.full_trees = full_trees
+        self.trees: List[List[int]] = []
+        self.dists: List[List[number]] = []
+        self.costs: List[List[number]] = []
+        self.expanded_nodes = 0
+
+        targets = frozenset(towns)
+        for town in towns:
+            if full_trees:
+                # repair() modifies the trees, they must not be shared with anyone else
+                pred, dist = graph.dijkstra(town)
+                tree = pred.copy(), dist.copy()
+            else:
+                tree = graph.path_cache.get(town, targets, "dijkstra_targets")
+                if tree is None:
+                    tree = graph.dijkstra_targets(town, towns)
+                    graph.path_cache.put(town, targets, tree, "dijkstra_targets")
+            self.expanded_nodes += graph.expanded_nodes
+            pred, dist = tree
+            self.trees.append(pred)
+            self.dists.append(dist)
+            self.costs.append([dist[other_town] for other_town in towns])
+        self.version = graph.version
+
+    def repair(self, changes: List[Tuple[int, int, number, number]]) -> int:
+        """
+        Update the trees and the costs after the weights of some edges changed (only with full_trees).
+        The routes must be valid for the graph before these changes
+        @param changes: (u, v, old_weight, new_weight) of the modified edges
+        @return: number of vertices updated in all the trees
+        """
+        updated = 0
+        for i, town in enumerate(self.towns):
+            pred, dist = self.trees[i], self.dists[i]
+            updated += len(self.graph.repair_shortest_paths(town, pred, dist, changes))
+            self.costs[i] = [dist[other_town] for other_town in self.towns]
+            self.graph.path_cache.put(town, None, (pred, dist), "heap")
+        self.version = self.graph.version
+        return updated
+
+    def path(self, i: int, j: int) -> List[int]:
+        """
+        path from towns[i] to towns[j], False if there is none
+        """
+        return AbstractGraph.path(self.trees[i], self.towns[i], self.towns[j])
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        return town_pairs(self.towns)
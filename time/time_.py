@@ -3,7 +3,8 @@ import pandas as pd
 from model.hexgrid import HexGrid
 
 
-def fill_excel_file(file_path: str, min_towns: int, max_towns: int, min_scale: int, max_scale: int, precision: int):
+def fill_excel_file(file_path: str, min_towns: int, max_towns: int, min_scale: int, max_scale: int, precision: int,
+                    engine: str = "heap", routing: str = "per_pair"):
     """
     fill an Excel file with the time needed to get the shortest network with dijkstra algorithm
     depending on the number of tiles and the number of cities
@@ -13,6 +14,9 @@ def fill_excel_file(file_path: str, min_towns: int, max_towns: int, min_scale: i
     @param min_scale: grid_width = grid_height = scale * 10
     @param max_scale:
     @param precision: number of iterations to make the average time
+    @param engine: dijkstra engine to time, "heap" or "naif"
+    @param routing: "per_pair" (one dijkstra per pair of towns) to compare the engines on the same work,
+    "per_town" (one heap dijkstra per town, engine is then ignored) to time the one-to-many routing
     """
     start = time.time()
     columns = []
@@ -24,7 +28,7 @@ def fill_excel_file(file_path: str, min_towns: int, max_towns: int, min_scale: i
                 hex_grid = HexGrid(i*10, i*10, nb_towns=j)
                 start_time = time.time()
 
-                hex_grid.shortest_network()
+                hex_grid.shortest_network(engine=engine, routing=routing)
 
                 end_time = time.time()
                 duration = end_time - start_time
@@ -48,5 +52,7 @@ fill_excel_file(
     file_path="dijkstra.xlsx",
     min_towns=2, max_towns=7,
     min_scale=2, max_scale=7,
-    precision=3
+    precision=3,
+    engine="heap",
+    routing="per_pair"
 )